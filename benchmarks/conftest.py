@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+"""
+import pytest
+
+from .synthetic import DEFAULT_SIZES, synthetic_wave_field
+
+
+@pytest.fixture(scope='module', params=DEFAULT_SIZES, ids=lambda size: 'x'.join(map(str, size)))
+def field(request):
+    """各规模的合成场；注入分量在检查时由 wave_component 重新生成，不随场驻留内存"""
+    return synthetic_wave_field(*request.param)[0]
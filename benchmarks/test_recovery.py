@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+
+WaveFilter 的正确性测试：各规模合成场上的滤波结果应还原注入的波动。
+"""
+import pytest
+
+from wave_tools import WaveFilter
+
+from .synthetic import SYNTHETIC_WAVES, check_wave_recovery, wave_component
+
+# 还原注入信号的阈值：相关系数下限，均方根之比与 1 的允许偏差
+MIN_CORR = 0.9
+AMP_TOL = 0.2
+
+
+@pytest.mark.parametrize('engine', ['batch', 'thread'])
+@pytest.mark.parametrize('wave_name', list(SYNTHETIC_WAVES))
+def test_wave_recovery(field, wave_name, engine):
+    filtered = WaveFilter().extract_wave_signal(field, wave_name, engine=engine)
+    injected = wave_component(wave_name, {d: field[d].values for d in ('time', 'lat', 'lon')})
+    check = check_wave_recovery(filtered, injected)
+    assert check['corr'] >= MIN_CORR
+    assert abs(check['amp_ratio'] - 1) <= AMP_TOL
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+
+WaveFilter 的性能基准（pytest-benchmark），覆盖 extract_wave_signal 整体和各阶段。
+
+保存本次结果，并与上次保存的结果比较（最短耗时变慢超过 10% 时失败）::
+
+    python -m pytest benchmarks/test_timing.py --benchmark-autosave
+    python -m pytest benchmarks/test_timing.py --benchmark-compare --benchmark-compare-fail=min:10%
+
+未安装 pytest-benchmark 时整个模块跳过。
+"""
+import pytest
+
+from wave_tools import WaveFilter
+from wave_tools.core import _compile_wk_mask
+
+from .synthetic import SYNTHETIC_WAVES
+
+pytest.importorskip('pytest_benchmark')
+
+# 每项计时的重复次数（大网格单次耗时以秒计，不做自动校准）
+ROUNDS = 3
+
+
+@pytest.fixture(scope='module')
+def anomaly(field):
+    """(time, lat, lon) 顺序的距平数组，供正/逆FFT阶段使用"""
+    return WaveFilter().remove_annual_cycle(field).transpose('time', 'lat', 'lon').values
+
+
+def _kelvin_mask(wf, field):
+    params = wf.get_wave_params('kelvin')
+    k_dim = field.sizes['lon'] - int(wf._lon_wraps(field.lon.values))
+    return wf._wk_mask(field.sizes['time'], k_dim, 1, *params['freq_range'],
+                       *params['wnum_range'], *params['equiv_depth'], 'kelvin')
+
+
+@pytest.mark.benchmark(group='extract_wave_signal')
+@pytest.mark.parametrize('engine', ['batch', 'thread'])
+@pytest.mark.parametrize('wave_name', list(SYNTHETIC_WAVES))
+def test_extract_wave_signal(benchmark, field, wave_name, engine):
+    benchmark.extra_info['n_points'] = field.size
+    benchmark.pedantic(WaveFilter().extract_wave_signal, args=(field, wave_name), kwargs={'engine': engine},
+                       rounds=ROUNDS, iterations=1)
+
+
+@pytest.mark.benchmark(group='climatology')
+def test_climatology(benchmark, field):
+    benchmark.pedantic(WaveFilter().daily_climatology, args=(field,), rounds=ROUNDS, iterations=1)
+
+
+@pytest.mark.benchmark(group='anomaly')
+def test_anomaly(benchmark, field):
+    wf = WaveFilter()
+    clim = wf.daily_climatology(field)
+    benchmark.pedantic(wf.remove_annual_cycle, args=(field,), kwargs={'clim': clim}, rounds=ROUNDS, iterations=1)
+
+
+@pytest.mark.benchmark(group='mask')
+def test_mask(benchmark, field):
+    wf = WaveFilter()
+    # 每轮前清空缓存，计的是掩膜编译而非缓存命中
+    benchmark.pedantic(_kelvin_mask, args=(wf, field), setup=_compile_wk_mask.cache_clear, rounds=ROUNDS)
+
+
+@pytest.mark.benchmark(group='forward_fft')
+def test_forward_fft(benchmark, field, anomaly):
+    benchmark.pedantic(WaveFilter()._forward_spectrum, args=(anomaly, field.lon.values), rounds=ROUNDS, iterations=1)
+
+
+@pytest.mark.benchmark(group='inverse_fft')
+def test_inverse_fft(benchmark, field, anomaly):
+    wf = WaveFilter()
+    mask = _kelvin_mask(wf, field)
+
+    def setup():
+        # 逆变换原位修改频谱，每轮重新计算正变换，只计逆变换的耗时
+        spectrum = wf._forward_spectrum(anomaly, field.lon.values)
+        return (spectrum, mask, field.sizes['time'], field.sizes['lon']), {'inplace': True}
+
+    benchmark.pedantic(wf._inverse_spectrum, setup=setup, rounds=ROUNDS)
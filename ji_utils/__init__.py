@@ -1 +1,2 @@
-from .grid import compute_dx_dy
+from .cal import compute_dx_dy
+from .eof import EOF
@@ -0,0 +1,192 @@
+# eof.py
+
+import numpy as np
+import xarray as xr
+from typing import List, Optional, Sequence, Union
+
+from .cal import compute_dx_dy
+
+
+class EOF:
+    """
+    基于随机化 SVD 的 EOF 分析（适用于滤波场和 RMM 类多变量指数）
+
+    只求前 n_modes 个模态：按 Halko 等 (2011) 的随机化截断 SVD，用随机投影和幂迭代得到
+    (time, space) 矩阵的近似列空间，再对小矩阵做精确 SVD。数据按时间块逐块读取，
+    不会构造完整的 (time, space) 矩阵，也不计算完整 SVD；dask 或惰性打开的输入每次只计算一个时间块。
+
+    面积权重由 compute_dx_dy 给出的网格面积 dx*dy 开平方得到；输入多个场时（如 OLR、U850、U200），
+    各场先除以其距平的标准差再拼接（RMM 的做法）。拟合后可用 project 将新观测逐日投影到已有 EOF 上。
+    """
+
+    def __init__(self,
+                 n_modes: int = 2,
+                 n_oversample: int = 10,
+                 n_iter: int = 4,
+                 time_chunk: int = 1000,
+                 area_weight: bool = True,
+                 random_state: Optional[int] = 0):
+        """
+        参数：
+            n_modes: 保留的模态数
+            n_oversample: 随机投影的额外维数，越大越精确
+            n_iter: 幂迭代次数，特征值衰减较慢时需要增大
+            time_chunk: 每次读入的时次数，决定峰值内存
+            area_weight: 是否按网格面积加权（需要 'lat' 和 'lon' 维）
+            random_state: 随机投影的随机种子
+        """
+        self.n_modes = n_modes
+        self.n_oversample = n_oversample
+        self.n_iter = n_iter
+        self.time_chunk = time_chunk
+        self.area_weight = area_weight
+        self.random_state = random_state
+
+    def _weights(self, field: xr.DataArray) -> np.ndarray:
+        """单个场展平后的空间权重（面积权重开平方，按均值归一）"""
+        space = field.isel(time=0, drop=True)
+        if not self.area_weight:
+            return np.ones(space.size)
+        if 'lat' not in space.dims or 'lon' not in space.dims:
+            raise ValueError("面积加权需要输入包含 'lat' 和 'lon' 维，或设 area_weight=False")
+        dx, dy = compute_dx_dy(space.lat.values, space.lon.values)
+        area = xr.DataArray(np.abs(dx * dy), dims=('lat', 'lon'))
+        area = area / area.mean()
+        return np.sqrt(area.broadcast_like(space).transpose(*space.dims).values).ravel()
+
+    @staticmethod
+    def _read(field: xr.DataArray, t_slice: slice) -> np.ndarray:
+        """读入单个场的一个时间块，展平为 (time, space) 数组"""
+        values = np.asarray(field.isel(time=t_slice).values, dtype=float)
+        return values.reshape(values.shape[0], -1)
+
+    def _block(self, t_slice: slice) -> np.ndarray:
+        """读入一个时间块，返回加权、标准化后的 (time, space) 矩阵（未去均值）"""
+        return np.concatenate([self._read(field, t_slice) * (weights / scale) for field, weights, scale
+                               in zip(self._fields, self._field_weights, self._scales)], axis=1)
+
+    def _time_slices(self) -> List[slice]:
+        n_time = self._n_time
+        return [slice(t0, min(t0 + self.time_chunk, n_time)) for t0 in range(0, n_time, self.time_chunk)]
+
+    def fit(self, fields: Union[xr.DataArray, Sequence[xr.DataArray]]) -> 'EOF':
+        """
+        计算 EOF 和主成分。
+
+        参数：
+            fields: 一个或多个 xr.DataArray（如 WaveFilter.extract_wave_signal 的结果），需包含 'time' 维，
+                    多个场时时间坐标须一致；可以是 dask 支持或惰性打开的数组
+
+        返回：
+            self，结果保存在 eofs_、pcs_、explained_variance_ratio_ 等属性中
+        """
+        if isinstance(fields, xr.DataArray):
+            fields = [fields]
+        fields = [f.transpose('time', ...) for f in fields]
+        for f in fields[1:]:
+            if not np.array_equal(f.time.values, fields[0].time.values):
+                raise ValueError("多个场的时间坐标必须一致")
+        self._fields = fields
+        self._field_weights = [self._weights(f) for f in fields]
+        self._n_time = fields[0].sizes['time']
+        slices = self._time_slices()
+
+        # 第一遍：逐块累加各格点的和与平方和，得到时间平均、各场距平的标准差（多场时用于标准化）和总方差
+        sums = [np.zeros(w.size) for w in self._field_weights]
+        sqs = [np.zeros(w.size) for w in self._field_weights]
+        for sl in slices:
+            for field, total, sq in zip(fields, sums, sqs):
+                values = self._read(field, sl)
+                total += values.sum(axis=0)
+                sq += (values ** 2).sum(axis=0)
+        n_time = self._n_time
+        self._scales = [1.0] * len(fields)
+        if len(fields) > 1:
+            # 各格点先减去自身的时间平均（与 EOF 的去均值一致），不随时间变化的空间结构不计入标准差
+            self._scales = [float(np.sqrt(max((sq - total ** 2 / n_time).sum() / (n_time * total.size), 0.0)))
+                            for total, sq in zip(sums, sqs)]
+
+        # 各格点距平的平方和为 Σx² - (Σx)²/n，乘以权重与标准化因子的平方后求和即为总方差
+        factors = [weights / scale for weights, scale in zip(self._field_weights, self._scales)]
+        mean = np.concatenate([total / n_time * f for total, f in zip(sums, factors)])
+        total_var = float(sum(((sq - total ** 2 / n_time) * f ** 2).sum() for total, sq, f in zip(sums, sqs, factors)))
+        n_space = mean.size
+
+        # 随机投影与幂迭代：Y = Xc Ω，Z = Xc^T Y，逐时间块累加
+        n_rank = min(self.n_modes + self.n_oversample, n_space, self._n_time)
+        rng = np.random.default_rng(self.random_state)
+        basis = rng.standard_normal((n_space, n_rank))
+        for _ in range(self.n_iter + 1):
+            y = np.concatenate([(self._block(sl) - mean) @ basis for sl in slices])
+            q, _ = np.linalg.qr(y)
+            z = np.zeros((n_space, n_rank))
+            for sl in slices:
+                z += (self._block(sl) - mean).T @ q[sl]
+            basis, _ = np.linalg.qr(z)
+
+        # 小矩阵 B = Q^T Xc = Z^T 的精确 SVD
+        _, s, vt = np.linalg.svd(z.T, full_matrices=False)
+        s, vt = s[:self.n_modes], vt[:self.n_modes]
+
+        # 符号约定：每个模态绝对值最大的载荷为正
+        sign = np.sign(vt[np.arange(len(s)), np.abs(vt).argmax(axis=1)])
+        vt *= sign[:, np.newaxis]
+        # 主成分取距平在 EOF 上的投影（而非近似的 Q·U·S），与 project 的结果严格一致
+        pcs = np.concatenate([(self._block(sl) - mean) @ vt.T for sl in slices])
+
+        self._mean = mean
+        self._vt = vt
+        self.singular_values_ = s
+        self.explained_variance_ratio_ = s ** 2 / total_var if total_var > 0 else np.zeros_like(s)
+        self.pc_std_ = pcs.std(axis=0)
+
+        modes = np.arange(1, len(s) + 1)
+        self.pcs_ = xr.DataArray(pcs, coords={'time': fields[0].time, 'mode': modes}, dims=('time', 'mode'),
+                                 attrs={'long_name': 'Principal Components'})
+        self.eofs_ = self._unflatten(vt, modes)
+        return self
+
+    def _unflatten(self, vt: np.ndarray, modes: np.ndarray) -> Union[xr.DataArray, List[xr.DataArray]]:
+        """将展平的 EOF 还原为各场的空间形状（去掉权重和标准化，为原单位下的空间型）"""
+        out = []
+        start = 0
+        for field, weights, scale in zip(self._fields, self._field_weights, self._scales):
+            space = field.isel(time=0, drop=True)
+            stop = start + weights.size
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pattern = vt[:, start:stop] / weights * scale
+            out.append(xr.DataArray(pattern.reshape((len(modes),) + space.shape),
+                                    coords={**space.coords, 'mode': modes}, dims=('mode', *space.dims),
+                                    attrs={'long_name': 'EOF', 'units': field.attrs.get('units', 'unknown')}))
+            start = stop
+        return out if len(out) > 1 else out[0]
+
+    def project(self,
+                fields: Union[xr.DataArray, Sequence[xr.DataArray]],
+                normalize: bool = True) -> xr.DataArray:
+        """
+        将新观测投影到已拟合的 EOF 上（实时指数：每天只需投影新的时次）。
+
+        参数：
+            fields: 与 fit 时相同变量、相同空间网格的场，可只包含新的一天或若干天（无 'time' 维时视为单个时次）
+            normalize: 是否除以拟合期主成分的标准差（RMM 指数的惯例）
+
+        返回：
+            dims=('time', 'mode') 的主成分
+        """
+        if isinstance(fields, xr.DataArray):
+            fields = [fields]
+        fields = [f if 'time' in f.dims else f.expand_dims('time') for f in fields]
+        fields = [f.transpose('time', *ref.dims[1:]) for f, ref in zip(fields, self._fields)]
+        parts = []
+        for field, weights, scale in zip(fields, self._field_weights, self._scales):
+            parts.append(self._read(field, slice(None)) * (weights / scale))
+        pcs = (np.concatenate(parts, axis=1) - self._mean) @ self._vt.T
+        if normalize:
+            pcs = pcs / self.pc_std_
+
+        coords = {'mode': np.arange(1, pcs.shape[1] + 1)}
+        if 'time' in fields[0].coords:
+            coords['time'] = fields[0].time
+        return xr.DataArray(pcs, coords=coords, dims=('time', 'mode'),
+                            attrs={'long_name': 'Projected Principal Components', 'normalized': int(normalize)})
@@ -15,6 +15,374 @@ import numpy as np
 from scipy import signal, fft
 from joblib import Parallel, delayed
 from typing import Tuple, Dict, Union, Optional, List, Any
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+import hashlib
+import json
+import tracemalloc
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+
+@lru_cache(maxsize=128)
+def _compile_wk_mask(time_dim: int,
+                     k_dim: int,
+                     obs_per_day: int,
+                     t_min: float,
+                     t_max: float,
+                     k_min: int,
+                     k_max: int,
+                     h_min: Optional[float],
+                     h_max: Optional[float],
+                     wave_name: str,
+                     beta: float,
+                     a: float) -> np.ndarray:
+    """
+    向量化编译WK99 (频率, 波数) 保留掩膜，结果按参数缓存（LRU，最多128组）。
+
+    参数：
+        time_dim: 时间维长度
+        k_dim: 参与FFT的经度点数
+        obs_per_day: 每天的观测次数
+        t_min, t_max: 周期范围（天）
+        k_min, k_max: 波数范围
+        h_min, h_max: 等效深度范围（米），None 表示不做色散截断
+        wave_name: 波动类型名称（小写）
+        beta, a: beta参数与地球半径
+
+    返回：
+        形状为 (time_dim // 2 + 1, k_dim) 的只读布尔掩膜，
+        波数轴为翻转后的WK约定（索引 i 对应波数 i 或 i - k_dim，正值为东传）
+    """
+    freq_dim = time_dim // 2 + 1
+    jj = np.arange(freq_dim)[:, np.newaxis]
+    ii = np.arange(k_dim)
+
+    # 周期截止
+    j_min = int(time_dim / (t_max * obs_per_day))
+    j_max = min(int(time_dim / (t_min * obs_per_day)), freq_dim)
+    mask = np.ones((freq_dim, k_dim), dtype=bool)
+    mask &= (jj >= j_min) & (jj <= j_max)
+
+    # 波数截止
+    if k_min < 0:
+        i_min = max(k_dim + k_min, k_dim // 2)
+    else:
+        i_min = min(k_min, k_dim // 2)
+    if k_max < 0:
+        i_max = max(k_dim + k_max, k_dim // 2)
+    else:
+        i_max = min(k_max, k_dim // 2)
+    if i_min < i_max:
+        mask &= (ii >= i_min) & (ii <= i_max)
+
+    # 色散滤波（波动类型），对所有波数一次计算
+    spc = 24 * 3600 / (2 * np.pi * obs_per_day)
+    k = np.where(ii > k_dim // 2, ii - k_dim, ii) / a
+    c = np.sqrt(9.8 * np.array([np.nan if h is None else h for h in (h_min, h_max)]))[:, np.newaxis]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if wave_name == "kelvin":
+            freq = k * c
+        elif wave_name == "er":
+            freq = -beta * k / (k**2 + 3 * beta / c)
+        elif wave_name in ("mrg", "ig0"):
+            root = np.sqrt(1 + 4 * beta / (k**2 * c))
+            freq = np.where(k > 0, k * c * (0.5 + 0.5 * root), k * c * (0.5 - 0.5 * root))
+            freq = np.where(k == 0, np.sqrt(beta * c), freq)
+        elif wave_name == "ig1":
+            freq = np.sqrt(3 * beta * c + (k**2 * c**2))
+        elif wave_name == "ig2":
+            freq = np.sqrt(5 * beta * c + (k**2 * c**2))
+        else:
+            freq = None
+
+    if freq is not None:
+        if h_min is not None:
+            # 与切片 [:j_min_wave] 语义一致：负索引从末端计数
+            j_min_wave = np.minimum(np.floor(freq[0] * spc * time_dim), freq_dim)
+            j_min_wave = np.where(j_min_wave < 0, np.maximum(j_min_wave + freq_dim, 0), j_min_wave)
+            mask &= jj >= j_min_wave
+        if h_max is not None:
+            j_max_wave = np.maximum(np.ceil(freq[1] * spc * time_dim), 0)
+            mask &= jj <= j_max_wave
+
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=32)
+def _tukey_taper(time_dim: int, dtype: str) -> np.ndarray:
+    """沿时间轴的 Tukey 窗（alpha=0.05），按长度和精度缓存，只读"""
+    taper = signal.windows.tukey(time_dim, alpha=0.05).astype(dtype)
+    taper.setflags(write=False)
+    return taper
+
+
+def _detrend_taper_inplace(data: np.ndarray, taper: np.ndarray, block: int = 512,
+                           detrend: bool = True) -> np.ndarray:
+    """
+    沿首轴原地去除线性趋势并乘以窗函数，结果与 signal.detrend 后加窗一致。
+
+    最小二乘斜率用中心化时间轴直接求出，逐块（每块 block 行）更新，
+    除与单个时次同形状的均值/斜率外，临时数组不超过 block 行。
+    detrend 为 False 时只加窗（数据已由调用方去趋势）。
+    """
+    n = data.shape[0]
+    shape = (-1,) + (1,) * (data.ndim - 1)
+    if detrend:
+        t = np.arange(n, dtype=data.dtype) - data.dtype.type((n - 1) / 2)
+        mean = data.mean(axis=0)
+        slope = np.tensordot(t, data, axes=(0, 0)) / (np.dot(t, t) or 1)
+    for i0 in range(0, n, block):
+        rows = data[i0:i0 + block]
+        if detrend:
+            rows -= mean
+            rows -= t[i0:i0 + block].reshape(shape) * slope
+        rows *= taper[i0:i0 + block].reshape(shape)
+    return data
+
+
+_work_buffers = threading.local()
+
+
+def _work_buffer(name: str, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """按线程复用的工作数组，形状或精度变化时才重新分配（内容未初始化）"""
+    cache = getattr(_work_buffers, 'cache', None)
+    if cache is None:
+        cache = _work_buffers.cache = {}
+    buf = cache.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = cache[name] = np.empty(shape, dtype=dtype)
+    return buf
+
+
+def _filter_block_inplace(wave_filter, src: np.ndarray, dst: np.ndarray,
+                          lat_slice: slice, lon: np.ndarray, kwargs: Dict) -> None:
+    """共享内存并行的工作函数：沿第二个轴从 src 读取一个批处理块，滤波后原位写入 dst"""
+    dst[:, lat_slice] = wave_filter._kf_filter_batch(np.asarray(src[:, lat_slice]), lon, **kwargs)
+
+
+_active_profiler: ContextVar = ContextVar('wave_filter_profiler', default=None)
+
+
+class StageProfiler:
+    """
+    WaveFilter 分阶段性能记录器（按需开启）。
+
+    在 with 语句内激活，期间所有 WaveFilter 调用的各阶段（气候态、距平、掩膜、正/逆FFT、
+    并行分发、结果组装等）都会记录一条：阶段名、耗时（秒）、阶段内新分配内存的峰值和净增量（字节，
+    基于 tracemalloc）、输入数组形状和类型。extract_wave_signal / extract_wave_signals
+    的结果还会在 attrs['profile'] 中附带本次调用的记录（JSON 字符串，可随 NetCDF 保存）。
+
+    用法::
+
+        with WaveFilter.profile(callback=logger.info) as prof:
+            out = wf.extract_wave_signal(ds, 'kelvin')
+        print(prof.report())
+
+    注意：并行引擎的子进程/线程内部不单独记录，其耗时计入外层的分发阶段。
+    """
+
+    def __init__(self, callback=None, trace_memory: bool = True):
+        """
+        参数：
+            callback: 每个阶段结束时以记录字典为参数调用，可用于写入日志
+            trace_memory: 是否用 tracemalloc 统计内存分配（有一定开销）
+        """
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self) -> 'StageProfiler':
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _active_profiler.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, data: Optional[np.ndarray] = None, **meta):
+        """记录一个阶段；data 为该阶段的主要输入数组，meta 为附加字段（如 wave）"""
+        record = {'stage': name, **meta,
+                  'shape': None if data is None else tuple(int(n) for n in data.shape),
+                  'dtype': None if data is None else str(data.dtype)}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t0 = perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = perf_counter() - t0
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record['bytes_allocated'] = max(peak - start, 0)
+                record['bytes_retained'] = current - start
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """按阶段汇总：调用次数、总耗时和最大分配峰值"""
+        out = {}
+        for rec in self.records:
+            agg = out.setdefault(rec['stage'], {'calls': 0, 'seconds': 0.0, 'bytes_allocated': 0})
+            agg['calls'] += 1
+            agg['seconds'] += rec['seconds']
+            agg['bytes_allocated'] = max(agg['bytes_allocated'], rec.get('bytes_allocated', 0))
+        return out
+
+    def report(self) -> str:
+        """返回按耗时排序的文本报告"""
+        summary = self.summary()
+        total = sum(agg['seconds'] for agg in summary.values()) or 1.0
+        lines = [f"{'stage':<16}{'calls':>6}{'seconds':>11}{'share':>8}{'peak MB':>10}"]
+        for name, agg in sorted(summary.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{name:<16}{agg['calls']:>6}{agg['seconds']:>11.4f}"
+                         f"{agg['seconds'] / total:>8.1%}{agg['bytes_allocated'] / 2 ** 20:>10.1f}")
+        return '\n'.join(lines)
+
+    def to_json(self, start: int = 0) -> str:
+        """将第 start 条起的记录序列化为 JSON 字符串"""
+        return json.dumps(self.records[start:], ensure_ascii=False)
+
+
+class FilterCache:
+    """
+    滤波结果的本地磁盘缓存（按需开启）。
+
+    以输入指纹和滤波参数为键，将 extract_wave_signal 的结果存为 cache_dir 下的 NetCDF 文件，
+    总大小超过 max_bytes 时按最近使用时间淘汰最旧的文件。
+
+    输入指纹包括名称、维度、形状、类型和全部坐标值；数据内容默认按来源区分：
+    由文件打开的数组（encoding 中有 'source'，如 netCDF4 引擎）使用文件路径、修改时间和大小，
+    否则对数据内容求哈希。对文件打开的数组做原地修改不会被识别，此时应设 content_hash=True。
+
+    用法::
+
+        cache = FilterCache('~/.cache/wave_filter', max_bytes=20 * 2 ** 30)
+        kelvin = wf.extract_wave_signal(olr, 'kelvin', cache=cache)
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 10 * 2 ** 30, content_hash: Optional[bool] = None):
+        """
+        参数：
+            cache_dir: 缓存目录，不存在时自动创建
+            max_bytes: 缓存总大小上限（字节）
+            content_hash: 是否对数据内容求哈希；None 表示仅在输入不是由文件打开时求哈希
+        """
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fingerprint(self, ds: xr.DataArray) -> str:
+        """输入数据的指纹（十六进制字符串）"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((ds.name, ds.dims, ds.shape, str(ds.dtype))).encode())
+        for name in sorted(ds.coords):
+            values = ds.coords[name].values
+            if values.dtype == object:
+                values = values.astype(str)
+            h.update(repr((name, ds.coords[name].dims, values.dtype.str)).encode())
+            h.update(np.ascontiguousarray(values))
+
+        source = ds.encoding.get('source')
+        use_content = self.content_hash
+        if use_content is None:
+            use_content = not (source and os.path.exists(source))
+        if use_content:
+            h.update(np.ascontiguousarray(ds.values))
+        else:
+            st = os.stat(source)
+            h.update(repr((os.path.abspath(source), st.st_mtime_ns, st.st_size)).encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def key(fingerprint: str, **params) -> str:
+        """由输入指纹和滤波参数生成缓存键"""
+        text = json.dumps({'input': fingerprint, **params}, sort_keys=True, default=str)
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.nc')
+
+    def get(self, key: str) -> Optional[xr.DataArray]:
+        """读取缓存结果，未命中时返回 None；命中时更新其使用时间"""
+        path = self._path(key)
+        try:
+            with xr.open_dataarray(path) as cached:
+                out = cached.load()
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        out.encoding = {}
+        # NetCDF 将元组属性存为数组，读回时还原
+        out.attrs = {k: tuple(v.tolist()) if isinstance(v, np.ndarray) else v for k, v in out.attrs.items()}
+        return out
+
+    def put(self, key: str, out: xr.DataArray) -> None:
+        """写入缓存（先写临时文件再原子替换），随后按大小上限淘汰"""
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(suffix='.nc.tmp', dir=self.cache_dir)
+        os.close(fd)
+        try:
+            out.to_netcdf(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """缓存文件列表 (路径, 字节数, 最近使用时间)，按使用时间从旧到新排列"""
+        out = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.nc'):
+                st = entry.stat()
+                out.append((entry.path, st.st_size, st.st_mtime))
+        return sorted(out, key=lambda item: item[2])
+
+    def size(self) -> int:
+        """缓存总大小（字节）"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """删除最久未使用的文件直到总大小不超过 max_bytes（默认为实例上限），返回删除的文件数"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self.evict(0)
 
 
 class WaveFilter:
@@ -65,6 +433,23 @@ class WaveFilter:
         self.beta = 2.28e-11  # 地球自转参数（单位：1/s/m）
         self.a = 6.37e6       # 地球半径（单位：m）
         
+    @staticmethod
+    def profile(callback=None, trace_memory: bool = True) -> StageProfiler:
+        """
+        创建分阶段性能记录器，在 with 语句中使用，见 StageProfiler。
+
+        参数：
+            callback: 每个阶段结束时以记录字典为参数调用
+            trace_memory: 是否统计内存分配
+        """
+        return StageProfiler(callback=callback, trace_memory=trace_memory)
+
+    @staticmethod
+    def _stage(name: str, data: Optional[np.ndarray] = None, **meta):
+        """当前有激活的 StageProfiler 时记录该阶段，否则为空上下文"""
+        profiler = _active_profiler.get()
+        return nullcontext() if profiler is None else profiler.stage(name, data, **meta)
+
     def extract_low_harmonics(self, 
                               data: xr.DataArray, 
                               n_harm: int = 3, 
@@ -80,18 +465,20 @@ class WaveFilter:
         返回：
             仅包含低阶谐波的重建数据，类型为 xarray.DataArray
         """
+        axis = data.get_axis_num(dim)
+
         # 傅里叶变换
-        z_fft = np.fft.rfft(data, axis=data.get_axis_num(dim))
-        # 设置频率
-        freqs = np.fft.rfftfreq(data.sizes[dim])
+        z_fft_n = np.fft.rfft(data.values, axis=axis)
         
-        # 保留低阶谐波并处理第 n_harm 阶的振幅
-        z_fft_n = z_fft.copy()
-        z_fft_n[n_harm,:,:] *= 0.5  # 第 n_harm 阶振幅减半
-        z_fft_n[(n_harm+1):,:,:] = 0
+        # 保留低阶谐波并处理第 n_harm 阶的振幅（沿 dim 轴索引，适用于任意维度排列）
+        index = [slice(None)] * z_fft_n.ndim
+        index[axis] = n_harm
+        z_fft_n[tuple(index)] *= 0.5  # 第 n_harm 阶振幅减半
+        index[axis] = slice(n_harm + 1, None)
+        z_fft_n[tuple(index)] = 0
       
         # 反傅里叶变换，保留实数部分
-        clim_low_harm = np.fft.irfft(z_fft_n, n=data.sizes[dim], axis=data.get_axis_num(dim)).real
+        clim_low_harm = np.fft.irfft(z_fft_n, n=data.sizes[dim], axis=axis).real
         
         # 保持 xarray 格式和原数据一致
         coords = {k: v for k, v in data.coords.items()}
@@ -115,7 +502,8 @@ class WaveFilter:
                   k_max: int, 
                   h_min: float, 
                   h_max: float, 
-                  wave_name: str) -> Union[xr.DataArray, np.ndarray]:
+                  wave_name: str,
+                  fast_len: bool = False) -> Union[xr.DataArray, np.ndarray]:
         """
         应用WK99滤波方法对2D时间-经度数据进行特定波动的滤波。
         
@@ -127,117 +515,42 @@ class WaveFilter:
             k_min, k_max: 波数范围
             h_min, h_max: 等效深度范围（米）
             wave_name: 波动类型名称
+            fast_len: 是否将时间轴补零到 scipy.fft.next_fast_len 长度再做FFT，
+                      周期和色散截止均按补零后的长度计算，输出截回原长度
             
         返回：
             与输入相同形状的已滤波数据
         """
         is_xarray = isinstance(in_data, xr.DataArray)
+        data_np = in_data.values if is_xarray else np.asarray(in_data)
+        time_dim, lon_dim = data_np.shape
 
-        if is_xarray:
-            data_np = in_data.values
-            time_dim, lon_dim = in_data.sizes["time"], in_data.sizes["lon"]
-        else:
-            data_np = in_data
-            time_dim, lon_dim = data_np.shape
-            
-        # 检查经度是否包裹（首尾相连）
-        wrap_flag = np.isclose((lon[0] + 360) % 360, lon[-1] % 360)
+        # 经度包裹（首尾相连）时丢掉第一个点：只在复制进工作数组时偏移列号，不生成切片副本
+        k0 = int(self._lon_wraps(lon))
+        k_dim = lon_dim - k0
 
-        if wrap_flag:
-            data = in_data.isel(lon=slice(1, None)) if is_xarray else in_data[:, 1:]  # 丢掉第一个点
-        else:
-            data = in_data
-        
-        if is_xarray:
-            data_np = data.values
-        else:
-            data_np = data
-        
-        # 去趋势和加窗处理
-        data_np = signal.detrend(data_np, axis=0)
-        data_np = signal.windows.tukey(time_dim, alpha=0.05)[:, np.newaxis] * data_np
-
-        # 二维FFT: timexlon
-        fft_data = fft.rfft2(data_np, axes=(1, 0))
-        fft_data[:, 1:] = fft_data[:, -1:0:-1]
-
-        # 频率/波数轴: 找到周期截止的索引
-        freq_dim = fft_data.shape[0]
-        k_dim = fft_data.shape[1]
-        j_min = int(time_dim / (t_max * obs_per_day))
-        j_max = int(time_dim / (t_min * obs_per_day))
-        j_max = min(j_max, freq_dim)
-        
-        # 找到波数截止的索引
-        if k_min < 0:
-            i_min = max(k_dim + k_min, k_dim // 2)
-        else:
-            i_min = min(k_min, k_dim // 2)
-        if k_max < 0:
-            i_max = max(k_dim + k_max, k_dim // 2)
-        else:
-            i_max = min(k_max, k_dim // 2)
+        # 复用的工作数组：前 time_dim 行为数据，其后为补零段（fast_len 时），原地去趋势和加窗
+        n_fft = self._fft_length(time_dim, fast_len)
+        dtype = np.result_type(data_np.dtype, np.float32)
+        work = _work_buffer('kf_filter', (n_fft, k_dim), dtype)
+        np.copyto(work[:time_dim], data_np[:, k0:])
+        work[time_dim:] = 0
+        _detrend_taper_inplace(work[:time_dim], _tukey_taper(time_dim, dtype.str))
 
-        # 按频率进行带通滤波: 设置相应系数为零
-        if j_min > 0:
-            fft_data[:j_min, :] = 0
-            
-        if j_max < freq_dim - 1:
-            fft_data[j_max + 1:, :] = 0
-            
-        if i_min < i_max:
-            if i_min > 0:
-                fft_data[:, :i_min] = 0
-                
-            if i_max < k_dim - 1:
-                fft_data[:, i_max + 1:] = 0
-                
-        # 色散滤波（波动类型）
-        spc = 24 * 3600 / (2 * np.pi * obs_per_day)
-        c = np.sqrt(9.8 * np.array([h_min, h_max]))
-        
-        for i in range(k_dim):
-            k = (i - k_dim if i > k_dim // 2 else i) / self.a  # 调整地球周长
-            
-            freq = np.array([0, freq_dim]) / spc
-            j_min_wave = 0
-            j_max_wave = freq_dim
-            
-            if wave_name.lower() == "kelvin":
-                freq = k * c
-            elif wave_name.lower() == "er":
-                freq = -self.beta * k / (k**2 + 3 * self.beta / c)
-            elif wave_name.lower() in ["mrg", "ig0"]:
-                if k == 0:
-                    freq = np.sqrt(self.beta * c)
-                elif k > 0:
-                    freq = k * c * (0.5 + 0.5 * np.sqrt(1 + 4 * self.beta / (k**2 * c)))
-                else:
-                    freq = k * c * (0.5 - 0.5 * np.sqrt(1 + 4 * self.beta / (k**2 * c)))
-            elif wave_name.lower() == "ig1":
-                freq = np.sqrt(3 * self.beta * c + (k**2 * c**2))
-            elif wave_name.lower() == "ig2":
-                freq = np.sqrt(5 * self.beta * c + (k**2 * c**2))
-            else:
-                continue
+        # 二维FFT: timexlon，频谱为本次调用唯一的复数数组
+        fft_data = fft.rfft2(work, axes=(1, 0))
 
-            j_min_wave = int(np.floor(freq[0] * spc * time_dim)) if not np.isnan(h_min) else 0
-            j_max_wave = int(np.ceil(freq[1] * spc * time_dim)) if not np.isnan(h_max) else freq_dim
-            j_min_wave = min(j_min_wave, freq_dim)
-            j_max_wave = max(j_max_wave, 0)
-            
-            # 设置相应系数为零
-            fft_data[:j_min_wave, i] = 0
-            if j_max_wave < freq_dim:
-                fft_data[j_max_wave + 1:, i] = 0
+        # 频率-波数掩膜（按参数缓存，已按 rfft 原始波数顺序排列，无需翻转频谱）
+        fft_data *= self._wk_mask(n_fft, k_dim, obs_per_day,
+                                  t_min, t_max, k_min, k_max, h_min, h_max, wave_name)
 
-        # 逆FFT
-        fft_data[:, 1:] = fft_data[:, -1:0:-1]
-        temp_data = np.real(fft.irfft2(fft_data, axes=(1, 0), s=(lon_dim, time_dim)))
+        # 逆FFT（实数输出，频谱可被覆盖），补零段截掉
+        temp_data = fft.irfft2(fft_data, axes=(1, 0), s=(lon_dim, n_fft), overwrite_x=True)[:time_dim]
+        del fft_data
 
         # 重构完整场
         if is_xarray:
-            out = in_data.copy(data=temp_data)
+            out = in_data.copy(deep=False, data=temp_data)
             if "dayofyear" in out.coords:
                 out = out.drop_vars("dayofyear")
             out.attrs.update({
@@ -249,80 +562,1320 @@ class WaveFilter:
             return out.transpose("time", "lon")
         else:
             return temp_data
-      
-    def extract_wave_signal(self, 
+
+    def _wk_mask(self,
+                 time_dim: int,
+                 k_dim: int,
+                 obs_per_day: int,
+                 t_min: float,
+                 t_max: float,
+                 k_min: int,
+                 k_max: int,
+                 h_min: float,
+                 h_max: float,
+                 wave_name: str) -> np.ndarray:
+        """
+        构造WK99滤波在 (频率, 波数) 空间中的保留掩膜，置零规则与 _kf_filter 完全一致。
+
+        参数：
+            time_dim: 时间维长度
+            k_dim: 参与FFT的经度点数（已去掉首尾重复点）
+            其余参数同 _kf_filter
+
+        返回：
+            形状为 (time_dim // 2 + 1, k_dim) 的布尔掩膜，波数轴按 rfft 的原始顺序排列，
+            可直接与未翻转的频谱相乘（掩膜本身按参数缓存，见 _compile_wk_mask）
+        """
+        mask = _compile_wk_mask(int(time_dim), int(k_dim), obs_per_day,
+                                float(t_min), float(t_max), int(k_min), int(k_max),
+                                None if np.isnan(h_min) else float(h_min),
+                                None if np.isnan(h_max) else float(h_max),
+                                wave_name.lower(), self.beta, self.a)
+        # 缓存中的掩膜为翻转后的WK波数顺序，这里换回 rfft 原始顺序
+        return mask[:, (-np.arange(k_dim)) % k_dim]
+
+    def _kf_filter_batch(self,
+                         data: np.ndarray,
+                         lon: np.ndarray,
+                         obs_per_day: int,
+                         t_min: float,
+                         t_max: float,
+                         k_min: int,
+                         k_max: int,
+                         h_min: float,
+                         h_max: float,
+                         wave_name: str,
+                         fast_len: bool = False,
+                         workers: Optional[int] = None,
+                         analytic: bool = False,
+                         detrend: bool = True) -> np.ndarray:
+        """
+        批量版WK99滤波：对整个 (time, ..., lon) 数据块一次完成去趋势、加窗、FFT、掩膜和逆FFT。
+
+        首轴为时间，末轴为经度，中间各维（如 lat）作为批处理轴，
+        结果与逐纬度调用 _kf_filter 相同。
+
+        参数：
+            data: 输入数组，形状为 (time, ..., lon)
+            workers: scipy.fft 的线程数，同时用于掩膜相乘的线程池，None 为单线程
+            analytic: 为 True 时返回复数解析信号，见 _inverse_spectrum
+            detrend: 为 False 时跳过去趋势（数据已由调用方去趋势，如实时滤波的补零序列），仍加窗
+            其余参数同 _kf_filter
+
+        返回：
+            与输入相同形状的已滤波数组
+        """
+        n_fft = self._fft_length(data.shape[0], fast_len)
+        k_dim = data.shape[-1] - int(self._lon_wraps(lon))
+        with self._stage('mask', wave=wave_name):
+            mask = self._wk_mask(n_fft, k_dim, obs_per_day,
+                                 t_min, t_max, k_min, k_max, h_min, h_max, wave_name)
+        return self._apply_spectral_mask(data, lon, mask, n_fft=n_fft, workers=workers, analytic=analytic,
+                                         detrend=detrend)
+
+    @staticmethod
+    def _fft_length(time_dim: int, fast_len: bool = False) -> int:
+        """时间轴FFT长度：fast_len 为 True 时取不小于 time_dim 的快速FFT长度"""
+        return fft.next_fast_len(time_dim, real=True) if fast_len else time_dim
+
+    @staticmethod
+    def _lon_wraps(lon: np.ndarray) -> bool:
+        """检查经度是否包裹（首尾相连）"""
+        return bool(np.isclose((lon[0] + 360) % 360, lon[-1] % 360))
+
+    @staticmethod
+    def _hemisphere_slices(lat: np.ndarray, axis: int, ndim: int) -> Tuple[Tuple, Tuple]:
+        """
+        关于赤道对称的纬度轴上互为镜像的两半的基本切片索引 (A, B)：
+        A 为后一半（含奇数长度时的赤道），B 为前一半的逆序，A[j] 与 B[j] 互为镜像纬度，均为视图不复制
+        """
+        lat = np.asarray(lat)
+        if not np.allclose(lat, -lat[::-1]):
+            raise ValueError("纬度网格须关于赤道对称才能做对称/反对称分解")
+        n_lat = len(lat)
+        index_a = [slice(None)] * ndim
+        index_b = [slice(None)] * ndim
+        index_a[axis] = slice(n_lat // 2, None)
+        index_b[axis] = slice((n_lat - 1) // 2, None, -1)
+        return tuple(index_a), tuple(index_b)
+
+    @staticmethod
+    def _split_symmetry(data: np.ndarray, lat: np.ndarray, axis: int, symmetry: str) -> np.ndarray:
+        """
+        原地做关于赤道的对称/反对称分解：在 data 的后一半纬度上写入 0.5 * (x(φ) ± x(-φ))，
+        返回该半球的视图（不复制）。之后 data 的前一半内容不再有意义，由 _mirror_symmetry 覆盖。
+        """
+        index_a, index_b = WaveFilter._hemisphere_slices(lat, axis, data.ndim)
+        half = data[index_a]
+        if symmetry == 'symmetric':
+            half += data[index_b]
+        else:
+            half -= data[index_b]
+        half *= 0.5
+        return half
+
+    @staticmethod
+    def _mirror_symmetry(out: np.ndarray, half: np.ndarray, lat: np.ndarray, axis: int, symmetry: str) -> np.ndarray:
+        """将半球的滤波结果写回完整纬度网格 out：对称分量镜像复制，反对称分量镜像取负"""
+        index_a, index_b = WaveFilter._hemisphere_slices(lat, axis, out.ndim)
+        out[index_a] = half
+        if symmetry == 'symmetric':
+            out[index_b] = half
+        else:
+            np.negative(half, out=out[index_b])
+        return out
+
+    @staticmethod
+    def _resolve_workers(n_jobs: int) -> int:
+        """将 joblib 风格的 n_jobs（-1 表示全部核心，-2 表示留一个核心，依此类推）换算为线程/进程数"""
+        n_cpu = os.cpu_count() or 1
+        return max(1, n_cpu + 1 + n_jobs if n_jobs < 0 else n_jobs)
+
+    @staticmethod
+    def _select_engine(n_workers: int) -> str:
+        """
+        按可用核心数自动选择滤波引擎：单核时用 'batch'，否则用 'thread'。
+
+        峰值内存（输入之外，以输入数组大小为单位）：'batch'/'thread' 约 2 倍
+        （加窗工作数组和复数频谱各一份，线程直接读取调用方的数组）；
+        'shared' 的距平和输出直接放在共享内存中（不复制），输出约 1 倍，
+        另加各进程块内的中间数组（同时运行的块合计约 2 倍）并需要启动进程池，
+        在单机上不比线程省内存或更快，因此不自动选择，只在显式指定时使用。
+        """
+        if n_workers <= 1:
+            return 'batch'
+        return 'thread'
+
+    @staticmethod
+    def _multiply_spectrum(fft_data: np.ndarray,
+                           mask: np.ndarray,
+                           out: Optional[np.ndarray] = None,
+                           workers: Optional[int] = None) -> np.ndarray:
+        """
+        频谱与掩膜逐元素相乘写入 out；workers 大于1时沿频率轴分块交给线程池
+        （numpy 乘法会释放 GIL）。
+        """
+        n_freq = fft_data.shape[0]
+        if workers is None or workers <= 1 or n_freq < 2 * workers:
+            return np.multiply(fft_data, mask, out=out)
+
+        if out is None:
+            out = np.empty_like(fft_data)
+        bounds = np.linspace(0, n_freq, workers + 1).astype(int)
+
+        def _block(i):
+            sl = slice(bounds[i], bounds[i + 1])
+            np.multiply(fft_data[sl], mask[sl], out=out[sl])
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_block, range(workers)))
+        return out
+
+    def _apply_spectral_mask(self,
+                             data: np.ndarray,
+                             lon: np.ndarray,
+                             mask: np.ndarray,
+                             n_fft: Optional[int] = None,
+                             workers: Optional[int] = None,
+                             analytic: bool = False,
+                             detrend: bool = True) -> np.ndarray:
+        """
+        对 (time, ..., lon) 数组做去趋势、加窗、时间/经度FFT，乘以频谱掩膜后逆变换。
+
+        参数：
+            data: 输入数组，首轴为时间，末轴为经度
+            lon: 经度坐标数组
+            mask: rfft 原始顺序下的 (频率, 波数) 掩膜或传递函数
+            n_fft: 时间轴FFT长度（补零），默认等于时间维长度
+            workers: scipy.fft 及掩膜相乘使用的线程数，None 为单线程
+            analytic: 为 True 时返回复数解析信号，见 _inverse_spectrum
+            detrend: 为 False 时跳过去趋势，只加窗
+
+        返回：
+            与输入相同形状的已滤波数组
+        """
+        with self._stage('forward_fft', data):
+            fft_data = self._forward_spectrum(data, lon, n_fft=n_fft, workers=workers, detrend=detrend)
+        with self._stage('inverse_fft', fft_data):
+            return self._inverse_spectrum(fft_data, mask, data.shape[0], data.shape[-1],
+                                          inplace=True, n_fft=n_fft, workers=workers, analytic=analytic)
+
+    def _forward_spectrum(self,
+                          data: np.ndarray,
+                          lon: np.ndarray,
+                          n_fft: Optional[int] = None,
+                          workers: Optional[int] = None,
+                          detrend: bool = True) -> np.ndarray:
+        """
+        对 (time, ..., lon) 数组去趋势、加窗并做时间/经度二维FFT（其余维度为批处理轴）。
+
+        n_fft 大于时间维长度时，加窗后的序列在末端补零到 n_fft 再变换；
+        workers 传给 scipy.fft，在单进程内用多线程并行各纬度的变换；
+        detrend 为 False 时跳过去趋势，只加窗。
+
+        返回：
+            形状为 (n_fft // 2 + 1, ..., k_dim) 的复数频谱，波数轴为 rfft 原始顺序
+        """
+        time_dim = data.shape[0]
+        n_fft = time_dim if n_fft is None else n_fft
+        k0 = int(self._lon_wraps(lon))  # 包裹时丢掉第一个点
+
+        # 复制到带补零段的工作数组，原地去趋势和加窗（沿时间轴），输入不被修改
+        dtype = np.result_type(data.dtype, np.float32)
+        work = np.empty((n_fft,) + data.shape[1:-1] + (data.shape[-1] - k0,), dtype=dtype)
+        np.copyto(work[:time_dim], data[..., k0:])
+        work[time_dim:] = 0
+        _detrend_taper_inplace(work[:time_dim], _tukey_taper(time_dim, dtype.str), detrend=detrend)
+
+        return fft.rfftn(work, axes=(-1, 0), workers=workers)
+
+    @staticmethod
+    def _inverse_spectrum(fft_data: np.ndarray,
+                          mask: np.ndarray,
+                          time_dim: int,
+                          lon_dim: int,
+                          inplace: bool = False,
+                          n_fft: Optional[int] = None,
+                          workers: Optional[int] = None,
+                          analytic: bool = False) -> np.ndarray:
+        """
+        将频谱乘以 (频率, 波数) 掩膜后逆变换回 (time, ..., lon) 空间。
+
+        参数：
+            fft_data: _forward_spectrum 得到的频谱
+            mask: rfft 原始顺序下的掩膜或传递函数
+            time_dim, lon_dim: 输出的时间和经度长度
+            inplace: 为 True 时直接在 fft_data 上相乘（会修改输入频谱）
+            n_fft: 正变换时的时间轴FFT长度，逆变换后截回 time_dim
+            workers: 逆FFT与掩膜相乘使用的线程数，None 为单线程
+            analytic: 为 True 时返回沿时间的复数解析信号 x + iH[x]：正频率（除0频和Nyquist外）加倍、
+                      负频率为零后做复数逆FFT，实部即滤波场，模为振幅包络，辐角为局地位相；
+                      与对滤波场做 scipy.signal.hilbert 的结果一致，但不需要额外的正/逆变换
+        """
+        if mask.dtype != bool:
+            mask = mask.astype(fft_data.real.dtype, copy=False)
+        mask = mask.reshape((mask.shape[0],) + (1,) * (fft_data.ndim - 2) + (mask.shape[1],))
+        fft_data = WaveFilter._multiply_spectrum(fft_data, mask, fft_data if inplace else None, workers)
+        n_fft = time_dim if n_fft is None else n_fft
+        if analytic:
+            # fft_data 此时为本函数所有（原地相乘或新分配），可直接修改；
+            # 与 irfft 一致，0频和Nyquist行在经度逆变换之后只保留实部
+            fft_data = fft.ifft(fft_data, n=lon_dim, axis=-1, workers=workers, overwrite_x=True)
+            n_pos = n_fft // 2 + 1 if n_fft % 2 else n_fft // 2
+            fft_data[1:n_pos] *= 2
+            fft_data[0].imag = 0
+            if n_fft % 2 == 0:
+                fft_data[-1].imag = 0
+            out = fft.ifft(fft_data, n=n_fft, axis=0, workers=workers, overwrite_x=True)
+        else:
+            out = fft.irfftn(fft_data, s=(lon_dim, n_fft), axes=(-1, 0), workers=workers, overwrite_x=True)
+        return out if n_fft == time_dim else out[:time_dim]
+
+    @staticmethod
+    def amplitude_phase(analytic: xr.DataArray) -> xr.Dataset:
+        """
+        由复数解析信号（extract_wave_signal(..., analytic=True) 的结果）求振幅包络与局地位相。
+
+        返回：
+            xr.Dataset，变量 signal（滤波场，即实部）、amplitude（振幅包络）、phase（位相，弧度）
+        """
+        attrs = dict(analytic.attrs)
+        name = str(attrs.get('waveName', '')).title()
+        return xr.Dataset({
+            'signal': analytic.real.assign_attrs({**attrs, 'long_name': f'{name} Wave Component'}),
+            'amplitude': np.abs(analytic).assign_attrs({**attrs, 'long_name': f'{name} Wave Amplitude'}),
+            'phase': xr.apply_ufunc(np.angle, analytic).assign_attrs(
+                {**attrs, 'long_name': f'{name} Wave Phase', 'units': 'radians'}),
+        })
+
+    @staticmethod
+    def _spectral_variance(fft_data: np.ndarray,
+                           mask: np.ndarray,
+                           time_dim: int,
+                           lon_dim: int,
+                           zonal_mean: bool = False,
+                           workers: Optional[int] = None) -> np.ndarray:
+        """
+        由Parseval定理从掩膜后的频谱直接求滤波场的时间方差，不做时间方向的逆变换。
+
+        只取掩膜非零的频率行参与计算；逐点方差只需沿经度逆变换这些行，
+        zonal_mean 为 True 且不含0频和Nyquist行时连经度逆变换也省去，直接对 |频谱|^2 求和。
+        结果与对 _inverse_spectrum 的输出求 .var('time')（ddof=0）一致。
+
+        参数：
+            fft_data: _forward_spectrum 得到的频谱（未补零，n_fft 等于 time_dim）
+            mask: rfft 原始顺序下的掩膜或传递函数
+            time_dim, lon_dim: 滤波场的时间和经度长度
+            zonal_mean: 为 True 时返回纬向平均的方差（去掉经度轴）
+            workers: 经度逆FFT的线程数，None 为单线程
+
+        返回：
+            形状为 fft_data.shape[1:-1] + (lon_dim,) 的方差（zonal_mean 时无经度轴）
+        """
+        n_freq = fft_data.shape[0]
+        rows = np.flatnonzero(mask.any(axis=1))
+        real_dtype = fft_data.real.dtype
+        if len(rows) == 0:
+            shape = fft_data.shape[1:-1] + (() if zonal_mean else (lon_dim,))
+            return np.zeros(shape, dtype=real_dtype)
+
+        mask = mask[rows].astype(real_dtype, copy=False)
+        spec = fft_data[rows] * mask.reshape((len(rows),) + (1,) * (fft_data.ndim - 2) + (mask.shape[1],))
+
+        # 单边谱：0频和Nyquist（偶数长度时）在 irfft 中只保留实部、权重为1，其余频率权重为2
+        edge = (rows == 0) | ((rows == n_freq - 1) & (time_dim % 2 == 0))
+        weights = np.where(edge, 1, 2).astype(real_dtype)
+
+        if zonal_mean and not edge.any():
+            # 经度方向的Parseval：ifft 按 lon_dim 归一化（包裹时频谱在末端补零到 lon_dim）
+            power = spec.real ** 2 + spec.imag ** 2
+            return np.tensordot(weights, power.sum(axis=-1), axes=(0, 0)) / (time_dim * lon_dim) ** 2
+
+        spec = fft.ifft(spec, n=lon_dim, axis=-1, workers=workers, overwrite_x=True)
+        spec[edge] = spec[edge].real
+        variance = np.tensordot(weights, spec.real ** 2 + spec.imag ** 2, axes=(0, 0)) / time_dim ** 2
+        if rows[0] == 0:
+            variance -= (spec[0].real / time_dim) ** 2  # 去掉时间平均（0频）的贡献
+        return variance.mean(axis=-1) if zonal_mean else variance
+
+    def get_transfer_function(self,
+                              wave_name: str,
+                              time_dim: int,
+                              lon: np.ndarray,
+                              obs_per_day: int = 1) -> xr.DataArray:
+        """
+        获取某一波动在 (频率, 波数) 空间中的滤波传递函数。
+
+        传递函数由缓存的掩膜构成，可用 apply_transfer_function 对同形状的场重复滤波，
+        每次只需一次FFT和一次乘法。
+
+        参数：
+            wave_name: 波动类型名称
+            time_dim: 时间维长度
+            lon: 经度坐标数组
+            obs_per_day: 每天的观测次数
+
+        返回：
+            dims=("frequency", "wavenumber") 的 xr.DataArray，取值为0/1；
+            frequency 单位为 cycles/day，wavenumber 正值为东传
+        """
+        params = self.get_wave_params(wave_name)
+        t_min, t_max = params['freq_range']
+        k_min, k_max = params['wnum_range']
+        h_min, h_max = params['equiv_depth']
+
+        lon = np.asarray(lon)
+        k_dim = len(lon) - int(self._lon_wraps(lon))
+        mask = self._wk_mask(time_dim, k_dim, obs_per_day,
+                             t_min, t_max, k_min, k_max, h_min, h_max, wave_name)
+
+        # rfft 原始列 (-w) % k_dim 对应东传为正的波数 w
+        wavenumber = np.fft.fftshift(np.fft.fftfreq(k_dim, 1 / k_dim)).astype(int)
+        frequency = np.fft.rfftfreq(time_dim, 1 / obs_per_day)
+
+        return xr.DataArray(
+            mask[:, (-wavenumber) % k_dim].astype(float),
+            coords={'frequency': frequency, 'wavenumber': wavenumber},
+            dims=('frequency', 'wavenumber'),
+            attrs={
+                'long_name': f'{wave_name.title()} Transfer Function',
+                'wavenumber_range': (k_min, k_max),
+                'period': (t_min, t_max),
+                'depth': (h_min, h_max),
+                'waveName': wave_name,
+                'time_dim': time_dim,
+                'lon_dim': len(lon),
+                'obs_per_day': obs_per_day
+            }
+        )
+
+    def apply_transfer_function(self,
+                                data: xr.DataArray,
+                                transfer: xr.DataArray) -> xr.DataArray:
+        """
+        用 get_transfer_function 得到的传递函数对 (time, ..., lon) 数据滤波。
+
+        参数：
+            data: 输入数据（通常为已去除年循环的距平），需包含 'time' 和 'lon' 维
+            transfer: dims=("frequency", "wavenumber") 的传递函数
+
+        返回：
+            滤波后的数据，xr.DataArray类型，维度顺序与输入一致
+        """
+        if (data.sizes['time'] != transfer.attrs['time_dim']
+                or data.sizes['lon'] != transfer.attrs['lon_dim']):
+            raise ValueError(f"传递函数的形状 (time={transfer.attrs['time_dim']}, "
+                             f"lon={transfer.attrs['lon_dim']}) 与输入数据不一致")
+
+        lon = data.lon.values
+        k_dim = len(lon) - int(self._lon_wraps(lon))
+        wavenumber = transfer.wavenumber.values
+        mask = np.zeros((transfer.sizes['frequency'], k_dim))
+        mask[:, (-wavenumber) % k_dim] = transfer.transpose('frequency', 'wavenumber').values
+
+        dims = data.dims
+        other = [d for d in dims if d not in ('time', 'lon')]
+        filtered = self._apply_spectral_mask(
+            data.transpose('time', *other, 'lon').values, lon, mask)
+
+        out = xr.DataArray(filtered, coords=data.coords, dims=('time', *other, 'lon'),
+                           attrs=dict(data.attrs))
+        out.attrs.update({k: transfer.attrs[k] for k in ('period', 'depth', 'waveName')})
+        out.attrs['wavenumber'] = transfer.attrs['wavenumber_range']
+        return out.transpose(*dims)
+
+    def _filter_by_lat(self,
+                       data: np.ndarray,
+                       lon: np.ndarray,
+                       obs_per_day: int,
+                       t_min: float,
+                       t_max: float,
+                       k_min: int,
+                       k_max: int,
+                       h_min: float,
+                       h_max: float,
+                       wave_name: str,
+                       use_parallel: bool = True,
+                       n_jobs: int = -1,
+                       fast_len: bool = False) -> np.ndarray:
+        """
+        逐纬度（逐批处理切片）调用 _kf_filter 的旧滤波路径（可选 joblib 并行），
+        输入输出均为 (time, batch, lon) 数组，batch 为 lat 及其余批处理维展平后的轴
+        """
+        def _filter_lat(lat_idx):
+            return self._kf_filter(
+                data[:, lat_idx],
+                lon=lon,
+                obs_per_day=obs_per_day,
+                t_min=t_min, t_max=t_max,
+                k_min=k_min, k_max=k_max,
+                h_min=h_min, h_max=h_max,
+                wave_name=wave_name,
+                fast_len=fast_len
+            )
+
+        n_lat = data.shape[1]
+        with self._stage('lat_dispatch', data):
+            if use_parallel:
+                filtered = Parallel(n_jobs=n_jobs)(delayed(_filter_lat)(i) for i in range(n_lat))
+            else:
+                filtered = [_filter_lat(i) for i in range(n_lat)]
+
+        # 组合结果
+        with self._stage('stack'):
+            return np.stack(filtered, axis=1)
+
+    def _filter_shared(self,
+                       data: np.ndarray,
+                       lon: np.ndarray,
+                       n_jobs: int = -1,
+                       lat_batch: Optional[int] = None,
+                       temp_folder: Optional[str] = None,
+                       **kwargs) -> np.ndarray:
+        """
+        基于内存映射的多进程滤波路径。
+
+        输入和输出数组放在共享内存（优先 /dev/shm）中的内存映射文件里，
+        各进程只接收文件引用，按第二个轴分块原位读写，不再逐纬度序列化数据。
+        输入已在共享内存中时（如 extract_wave_signal 直接写入的距平）不再复制；
+        输出直接返回共享内存中的数组，不复制回进程内存。
+        峰值内存为共享内存中的输出一份（输入不在共享内存时再加一份副本），
+        再加上各进程处理块时的中间数组。
+
+        参数：
+            data: 输入数组，形状为 (time, batch..., lon)，沿 time 之后的第一个轴分块
+                  （extract_wave_signal 传入时通常为 lat 及其余批处理维展平后的轴）
+            lon: 经度坐标数组
+            n_jobs: 并行作业数量，-1表示使用所有可用核心
+            lat_batch: 每个任务处理的切片数（沿第二个轴），默认按作业数平均分配
+            temp_folder: 内存映射文件所在目录，默认优先使用 /dev/shm
+            kwargs: 传给 _kf_filter_batch 的滤波参数
+
+        返回：
+            与输入相同形状、以共享内存为底层数据的已滤波数组（回收时删除临时文件）
+        """
+        n_lat = data.shape[1]
+        if lat_batch is None:
+            n_workers = os.cpu_count() if n_jobs < 0 else n_jobs
+            lat_batch = max(1, -(-n_lat // max(n_workers, 1)))
+
+        src = data
+        if self._shared_backing(data) is None:
+            with self._stage('shared_copy', data):
+                src = self._shared_buffer(data.shape, data.dtype, temp_folder)
+                src[:] = data
+        dst = self._shared_buffer(data.shape, data.dtype, temp_folder)
+
+        blocks = [slice(i, min(i + lat_batch, n_lat)) for i in range(0, n_lat, lat_batch)]
+        with self._stage('shared_dispatch', data, n_blocks=len(blocks)):
+            Parallel(n_jobs=n_jobs)(
+                delayed(_filter_block_inplace)(self, src, dst, block, lon, kwargs) for block in blocks
+            )
+        return np.asarray(dst)
+
+    @staticmethod
+    def _shared_buffer(shape: Tuple[int, ...],
+                       dtype: Union[str, np.dtype],
+                       temp_folder: Optional[str] = None) -> np.memmap:
+        """
+        在共享内存（默认优先 /dev/shm）中新建内存映射数组，供 'shared' 引擎的各进程按文件引用读写。
+
+        临时目录在该数组及其全部视图被回收时删除，因此可以直接作为结果交给调用方，无需复制回进程内存。
+        """
+        if temp_folder is None and os.path.isdir('/dev/shm'):
+            temp_folder = '/dev/shm'
+        folder = tempfile.mkdtemp(prefix='wavefilter_', dir=temp_folder)
+        buffer = np.lib.format.open_memmap(os.path.join(folder, 'data.npy'), mode='w+', dtype=dtype, shape=shape)
+        weakref.finalize(buffer, shutil.rmtree, folder, True)
+        return buffer
+
+    @staticmethod
+    def _shared_backing(data: np.ndarray) -> Optional[np.memmap]:
+        """沿视图链查找数组的内存映射底层数组，不是内存映射时返回 None"""
+        while data is not None and not isinstance(data, np.memmap):
+            data = getattr(data, 'base', None)
+        return data
+
+    def extract_wave_signal(self,
                            ds: xr.DataArray, 
                            wave_name: str = 'kelvin', 
                            obs_per_day: int = 1, 
                            use_parallel: bool = True, 
                            n_jobs: int = -1,
-                           n_harm: int = 3) -> xr.DataArray:
+                           n_harm: int = 3,
+                           engine: str = 'auto',
+                           lat_batch: Optional[int] = None,
+                           dtype: Union[str, np.dtype] = 'float64',
+                           fast_len: bool = False,
+                           cache: Optional[Union[str, FilterCache]] = None,
+                           symmetry: Optional[str] = None,
+                           analytic: bool = False) -> xr.DataArray:
         """
         对气候数据进行年循环去除，并滤波提取特定波动成分
         
         参数：
-            ds: 输入数据，xr.DataArray类型，维度应包含('time', 'lat', 'lon')
+            ds: 输入数据，xr.DataArray类型，维度应包含 'time' 和 'lon'；其余维度（lat、level、
+                集合成员等）均作为批处理轴在一次计算中完成，输出保留全部坐标，维度顺序与输入一致
             wave_name: 波动类型名称，可选值: 'kelvin', 'er', 'mrg', 'ig', 'mjo', 'td'
             obs_per_day: 每天的观测次数（例如，6小时数据为4）
             use_parallel: 是否使用并行计算
             n_jobs: 并行计算的作业数量，-1表示使用所有可用核心
             n_harm: 年循环谐波提取时保留的谐波数
+            engine: 滤波引擎（使用 WaveFilter.profile 记录性能时，实际所用引擎写入结果的 attrs['engine']），
+                    'batch' 对整个 (time, lat, lon) 数据块做一次批量FFT，
+                    'thread' 同 'batch' 但FFT和掩膜相乘在单进程内多线程执行（scipy.fft workers），
+                    'lat' 为逐纬度调用 _kf_filter 的旧实现，
+                    'shared' 为基于内存映射的多进程实现，输入输出不经序列化，
+                    距平和输出直接放在共享内存中，不额外复制，
+                    'auto'（默认）单核时用 'batch'，否则用 'thread'（峰值内存见 _select_engine）
+                    （use_parallel/n_jobs 对 'thread'、'lat'、'shared' 和 'auto' 生效）
+            lat_batch: 'shared' 引擎下每个任务处理的纬度数（有其他批处理维时为展平后的切片数），
+                       默认按作业数平均分配
+            dtype: 计算精度，'float64'（默认）或 'float32'。float32 时距平、去趋势、FFT（complex64）、
+                   掩膜和逆变换全程保持单精度，中间数组内存约减半；
+                   与 float64 结果相比，滤波场的均方根误差约为其标准差的 1e-6，
+                   逐点最大误差不超过标准差的 1e-5 量级（气候态累加仍用 float64）
+            fast_len: 是否将时间轴补零到 scipy.fft.next_fast_len 长度，
+                      使FFT耗时不再受记录长度的大素因子影响；截止频率按补零后的长度计算，输出截回原长度
+            cache: FilterCache 实例或缓存目录路径，给出时先按输入指纹和滤波参数查找磁盘缓存，
+                   命中则直接返回，否则计算后写入缓存（引擎与并行设置不参与缓存键）；
+                   命中时若正在 WaveFilter.profile 记录，结果的 attrs['engine'] 为 'cache'
+            symmetry: 关于赤道的分解方式，None（默认）直接滤波原场，
+                      'symmetric' / 'antisymmetric' 先在距平上原地求对称/反对称分量（须有关于赤道对称的
+                      'lat' 维），只对一个半球滤波后再镜像回完整纬度网格，FFT 计算量减半；
+                      通常 Kelvin、ER 波取对称分量，MRG 波取反对称分量
+            analytic: 为 True 时在同一次逆变换中返回复数解析信号（实部为滤波场，见 _inverse_spectrum），
+                      可用 amplitude_phase 得到振幅包络和局地位相；只支持 'batch'/'thread' 引擎
+                      （'auto' 在二者中选择），不能与 cache 同时使用
             
         返回：
             提取的波动信号，xr.DataArray类型
         """
         # 检查波动类型是否有效
         assert wave_name in self.wave_params, f"wave_name必须是以下之一: {list(self.wave_params.keys())}"
+        if engine not in ('auto', 'batch', 'thread', 'lat', 'shared'):
+            raise ValueError(f"未知的滤波引擎: {engine}，可选: 'auto', 'batch', 'thread', 'lat', 'shared'")
+        self._check_symmetry(symmetry, ds)
+        if analytic and engine in ('lat', 'shared'):
+            raise ValueError(f"解析信号输出只支持 'batch'、'thread' 和 'auto' 引擎，不支持 '{engine}'")
+        if analytic and cache is not None:
+            raise ValueError("解析信号输出不能与 cache 同时使用")
+        profiler = _active_profiler.get()
+        n_record = 0 if profiler is None else len(profiler.records)
+        params = self.wave_params[wave_name]
 
-        # 步骤1: 年循环去除
-        clim = ds.groupby('time.dayofyear').mean(dim='time')
-        clim_fit = self.extract_low_harmonics(clim, n_harm=n_harm)
-        anomaly = ds.groupby('time.dayofyear') - clim_fit
+        # 步骤0: 磁盘缓存
+        if cache is not None:
+            if not isinstance(cache, FilterCache):
+                cache = FilterCache(cache)
+            with self._stage('cache_lookup', ds):
+                cache_key = cache.key(cache.fingerprint(ds), wave_name=wave_name, **params,
+                                      obs_per_day=obs_per_day, n_harm=n_harm, dtype=np.dtype(dtype).str,
+                                      fast_len=fast_len, symmetry=symmetry, beta=self.beta, a=self.a)
+                cached = cache.get(cache_key)
+            if cached is not None:
+                if profiler is not None:
+                    cached.attrs['engine'] = 'cache'
+                    cached.attrs['profile'] = profiler.to_json(n_record)
+                return cached
+
+        n_workers = self._resolve_workers(n_jobs) if use_parallel else 1
+        if engine == 'auto':
+            engine = self._select_engine(n_workers)
+
+        # 步骤1: 年循环去除，按 (time, ..., lon) 顺序写出；'shared' 引擎直接写入共享内存，供各进程读取而不复制
+        ds_t = ds.transpose('time', ..., 'lon')
+        buffer = self._shared_buffer(ds_t.shape, dtype) if engine == 'shared' else None
+        full = self.remove_annual_cycle(ds_t, n_harm=n_harm, dtype=dtype, out=buffer).values
+        del ds_t, buffer
         
         # 步骤2: 参数提取
-        params = self.wave_params[wave_name]
         t_min, t_max = params['freq_range']
         k_min, k_max = params['wnum_range']
         h_min, h_max = params['equiv_depth']
         lon = ds.lon.values
+        others = [d for d in ds.dims if d not in ('time', 'lon')]
+        if symmetry is not None:
+            lat_axis = 1 + others.index('lat')
+            with self._stage('symmetry', full):
+                data = self._split_symmetry(full, ds.lat.values, lat_axis, symmetry)
+        else:
+            data = full
         
-        # 步骤3: 滤波主逻辑（逐纬度调用 kf_filter）
-        def _filter_lat(lat_idx):
-            in_data = anomaly.isel(lat=lat_idx)
-            return self._kf_filter(
-                in_data.values if use_parallel else in_data,
+        # 步骤3: 滤波主逻辑（'shared' 和 'lat' 引擎将 time、lon 之外的维度展平为一个批处理轴）
+        flat_shape = (data.shape[0], -1, data.shape[-1])
+        if engine in ('batch', 'thread'):
+            # 整块 (time, ..., lon) 一次FFT，中间各维作为批处理轴
+            filtered = self._kf_filter_batch(
+                data,
                 lon=lon,
                 obs_per_day=obs_per_day,
                 t_min=t_min, t_max=t_max,
                 k_min=k_min, k_max=k_max,
                 h_min=h_min, h_max=h_max,
-                wave_name=wave_name
+                wave_name=wave_name,
+                fast_len=fast_len,
+                workers=n_workers if engine == 'thread' else None,
+                analytic=analytic
             )
-
-        if use_parallel:
-            filtered = Parallel(n_jobs=n_jobs)(delayed(_filter_lat)(i) for i in range(len(ds.lat)))
+        elif engine == 'shared':
+            # 连续数组展平是视图；对称分解后的半球视图不连续，直接沿第二个轴分块，避免 reshape 复制
+            filtered = self._filter_shared(
+                data.reshape(flat_shape) if data.flags.c_contiguous else data,
+                lon=lon,
+                n_jobs=n_workers,
+                lat_batch=lat_batch,
+                obs_per_day=obs_per_day,
+                t_min=t_min, t_max=t_max,
+                k_min=k_min, k_max=k_max,
+                h_min=h_min, h_max=h_max,
+                wave_name=wave_name,
+                fast_len=fast_len
+            ).reshape(data.shape)
         else:
-            filtered = [_filter_lat(i) for i in range(len(ds.lat))]
-
-        # 组合结果
-        filtered = np.stack(filtered, axis=1)
+            filtered = self._filter_by_lat(data.reshape(flat_shape), lon, obs_per_day, t_min, t_max,
+                                           k_min, k_max, h_min, h_max, wave_name,
+                                           use_parallel, n_jobs, fast_len).reshape(data.shape)
+        if symmetry is not None:
+            # 滤波结果镜像回完整纬度网格，直接复用距平缓冲区
+            with self._stage('symmetry', filtered):
+                if analytic:
+                    full = np.empty(full.shape, dtype=filtered.dtype)
+                filtered = self._mirror_symmetry(full, filtered, ds.lat.values, lat_axis, symmetry)
         
         # 步骤4: 构造新的 DataArray
-        da_filtered = xr.DataArray(
+        with self._stage('wrap', filtered):
+            out = self._wrap_filtered(filtered, ds, wave_name)
+            if symmetry is not None:
+                out.attrs['symmetry'] = symmetry
+            if analytic:
+                out.attrs['long_name'] = f'{wave_name.title()} Wave Analytic Signal'
+        if cache is not None:
+            with self._stage('cache_store', filtered):
+                cache.put(cache_key, out)
+        if profiler is not None:
+            out.attrs['engine'] = engine
+            out.attrs['profile'] = profiler.to_json(n_record)
+        return out
+
+    def extract_wave_signals(self,
+                             ds: xr.DataArray,
+                             waves: Optional[List[str]] = None,
+                             obs_per_day: int = 1,
+                             n_harm: int = 3,
+                             dtype: Union[str, np.dtype] = 'float64',
+                             fast_len: bool = False,
+                             n_jobs: int = 1,
+                             symmetry: Optional[str] = None,
+                             analytic: bool = False) -> xr.Dataset:
+        """
+        一次提取多种波动：年循环、距平和正向FFT只计算一次，各波动仅做掩膜与逆FFT。
+
+        参数：
+            ds: 输入数据，xr.DataArray类型，维度应包含 'time' 和 'lon'，其余维度作为批处理轴
+            waves: 波动类型名称列表，默认使用 wave_params 中的全部波动
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 计算精度，'float64'（默认）或 'float32'，见 extract_wave_signal
+            fast_len: 是否将时间轴补零到快速FFT长度，见 extract_wave_signal
+            n_jobs: scipy.fft 及掩膜相乘的线程数，-1 表示使用所有可用核心（默认单线程）
+            symmetry: 关于赤道的分解方式（None、'symmetric' 或 'antisymmetric'），对所有波动相同，
+                      见 extract_wave_signal
+            analytic: 为 True 时各波动均为复数解析信号，见 extract_wave_signal
+
+        返回：
+            xr.Dataset，每种波动为一个变量，变量属性与 extract_wave_signal 的结果一致
+        """
+        if waves is None:
+            waves = self.get_available_waves()
+        for wave_name in waves:
+            assert wave_name in self.wave_params, f"wave_name必须是以下之一: {list(self.wave_params.keys())}"
+        self._check_symmetry(symmetry, ds)
+
+        profiler = _active_profiler.get()
+        n_record = 0 if profiler is None else len(profiler.records)
+
+        # 共享的年循环去除、对称分解和正向频谱
+        anomaly = self.remove_annual_cycle(ds, n_harm=n_harm, dtype=dtype)
+        lon = ds.lon.values
+        time_dim, lon_dim = ds.sizes['time'], ds.sizes['lon']
+        n_fft = self._fft_length(time_dim, fast_len)
+        workers = self._resolve_workers(n_jobs)
+        data = anomaly.transpose('time', ..., 'lon').values
+        del anomaly
+        if symmetry is not None:
+            lat_axis = 1 + [d for d in ds.dims if d not in ('time', 'lon')].index('lat')
+            with self._stage('symmetry', data):
+                half = self._split_symmetry(data, ds.lat.values, lat_axis, symmetry)
+            out_shape = data.shape
+            del data
+            data = half
+        with self._stage('forward_fft', data):
+            fft_data = self._forward_spectrum(data, lon, n_fft=n_fft, workers=workers)
+        del data
+
+        # 各波动：掩膜 + 逆FFT
+        out = {}
+        for wave_name in waves:
+            params = self.wave_params[wave_name]
+            with self._stage('mask', wave=wave_name):
+                mask = self._wk_mask(n_fft, fft_data.shape[-1], obs_per_day,
+                                     *params['freq_range'], *params['wnum_range'],
+                                     *params['equiv_depth'], wave_name)
+            with self._stage('inverse_fft', fft_data, wave=wave_name):
+                filtered = self._inverse_spectrum(fft_data, mask, time_dim, lon_dim, n_fft=n_fft,
+                                                  workers=workers, analytic=analytic)
+            if symmetry is not None:
+                with self._stage('symmetry', filtered, wave=wave_name):
+                    filtered = self._mirror_symmetry(np.empty(out_shape, dtype=filtered.dtype), filtered,
+                                                     ds.lat.values, lat_axis, symmetry)
+            with self._stage('wrap', filtered, wave=wave_name):
+                out[wave_name] = self._wrap_filtered(filtered, ds, wave_name)
+                if analytic:
+                    out[wave_name].attrs['long_name'] = f'{wave_name.title()} Wave Analytic Signal'
+
+        attrs = {'n_harm': n_harm, 'obs_per_day': obs_per_day}
+        if symmetry is not None:
+            attrs['symmetry'] = symmetry
+        if profiler is not None:
+            attrs['profile'] = profiler.to_json(n_record)
+        return xr.Dataset(out, attrs=attrs)
+
+    def wave_variance(self,
+                      ds: xr.DataArray,
+                      waves: Optional[List[str]] = None,
+                      obs_per_day: int = 1,
+                      n_harm: int = 3,
+                      dtype: Union[str, np.dtype] = 'float64',
+                      zonal_mean: bool = False,
+                      std: bool = False,
+                      n_jobs: int = 1) -> xr.Dataset:
+        """
+        由掩膜后的频谱直接计算各波动滤波场的时间方差（Parseval定理），不重构滤波时间序列。
+
+        年循环、距平和正向FFT只计算一次；各波动只取掩膜内的频率行，
+        结果等于 extract_wave_signal(...).var('time')，但不生成与输入同样大小的滤波场，
+        适合只需要方差/标准差分布图的场合（如 check_filter_wave、plot_multiple_wave_trends）。
+
+        参数：
+            ds: 输入数据，xr.DataArray类型，维度应包含 'time' 和 'lon'，其余维度作为批处理轴
+            waves: 波动类型名称列表，默认使用 wave_params 中的全部波动
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 计算精度，'float64'（默认）或 'float32'，见 extract_wave_signal
+            zonal_mean: 为 True 时返回纬向平均的方差（按纬度等批处理维给出，去掉 lon 维）
+            std: 为 True 时返回标准差而非方差
+            n_jobs: scipy.fft 的线程数，-1 表示使用所有可用核心（默认单线程）
+
+        返回：
+            xr.Dataset，每种波动为一个变量，维度为 ds 去掉 'time'（zonal_mean 时再去掉 'lon'）
+        """
+        if waves is None:
+            waves = self.get_available_waves()
+        for wave_name in waves:
+            assert wave_name in self.wave_params, f"wave_name必须是以下之一: {list(self.wave_params.keys())}"
+
+        profiler = _active_profiler.get()
+        n_record = 0 if profiler is None else len(profiler.records)
+
+        anomaly = self.remove_annual_cycle(ds, n_harm=n_harm, dtype=dtype)
+        lon = ds.lon.values
+        time_dim, lon_dim = ds.sizes['time'], ds.sizes['lon']
+        workers = self._resolve_workers(n_jobs)
+        with self._stage('forward_fft', anomaly):
+            fft_data = self._forward_spectrum(anomaly.transpose('time', ..., 'lon').values, lon, workers=workers)
+        del anomaly
+
+        others = [d for d in ds.dims if d not in ('time', 'lon')]
+        dims = tuple(others) if zonal_mean else (*others, 'lon')
+        coords = {k: v for k, v in ds.coords.items() if set(v.dims) <= set(dims)}
+        units = ds.attrs.get('units', 'unknown')
+
+        out = {}
+        for wave_name in waves:
+            params = self.wave_params[wave_name]
+            with self._stage('mask', wave=wave_name):
+                mask = self._wk_mask(time_dim, fft_data.shape[-1], obs_per_day,
+                                     *params['freq_range'], *params['wnum_range'],
+                                     *params['equiv_depth'], wave_name)
+            with self._stage('variance', fft_data, wave=wave_name):
+                variance = self._spectral_variance(fft_data, mask, time_dim, lon_dim,
+                                                   zonal_mean=zonal_mean, workers=workers)
+            out[wave_name] = xr.DataArray(
+                np.sqrt(variance) if std else variance,
+                coords=coords,
+                dims=dims,
+                attrs={
+                    'long_name': f"{wave_name.title()} Wave {'STD' if std else 'Variance'}",
+                    'units': units if std else f'({units})^2',
+                    'wavenumber': params['wnum_range'],
+                    'period': params['freq_range'],
+                    'depth': params['equiv_depth'],
+                    'waveName': wave_name
+                }
+            ).transpose(*[d for d in ds.dims if d in dims])
+
+        attrs = {'n_harm': n_harm, 'obs_per_day': obs_per_day, 'zonal_mean': int(zonal_mean)}
+        if profiler is not None:
+            attrs['profile'] = profiler.to_json(n_record)
+        return xr.Dataset(out, attrs=attrs)
+
+    def extract_wave_spectrum(self,
+                              ds: xr.DataArray,
+                              wave_name: str = 'kelvin',
+                              obs_per_day: int = 1,
+                              n_harm: int = 3,
+                              dtype: Union[str, np.dtype] = 'float64',
+                              fast_len: bool = False,
+                              n_jobs: int = 1) -> xr.Dataset:
+        """
+        以紧凑的带限频谱格式保存滤波结果：只保留掩膜内的 (频率, 波数) 系数及重建所需的元数据。
+
+        WK99 掩膜通常只保留不到 5% 的系数，按 (time, lat, lon) 存储的滤波场大部分是冗余信息；
+        紧凑格式可直接 to_netcdf 保存，用 reconstruct_wave_signal 按需重建任意时间/经度子集，
+        重建结果与 extract_wave_signal（同样参数）一致。
+
+        参数：
+            ds: 输入数据，xr.DataArray类型，维度应包含 'time' 和 'lon'，其余维度作为批处理轴
+            wave_name: 波动类型名称
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 系数的存储精度，'float64'（默认）或 'float32'
+            fast_len: 是否将时间轴补零到快速FFT长度
+            n_jobs: scipy.fft 的线程数，-1 表示使用所有可用核心（默认单线程）
+
+        返回：
+            xr.Dataset：
+                coef_real / coef_imag: dims=(批处理维..., 'coef') 的系数实部和虚部
+                freq_index / wave_index: 'coef' 维上的坐标，为系数在 rfft 原始顺序频谱中的频率行号和波数列号
+                time / lon 及批处理维坐标保留，attrs 中记录 n_fft、k_dim、原维度顺序和波动参数
+        """
+        assert wave_name in self.wave_params, f"wave_name必须是以下之一: {list(self.wave_params.keys())}"
+        params = self.wave_params[wave_name]
+
+        anomaly = self.remove_annual_cycle(ds, n_harm=n_harm, dtype=dtype)
+        lon = ds.lon.values
+        time_dim = ds.sizes['time']
+        n_fft = self._fft_length(time_dim, fast_len)
+        with self._stage('forward_fft', anomaly):
+            fft_data = self._forward_spectrum(anomaly.transpose('time', ..., 'lon').values, lon,
+                                              n_fft=n_fft, workers=self._resolve_workers(n_jobs))
+        del anomaly
+        k_dim = fft_data.shape[-1]
+
+        with self._stage('mask', wave=wave_name):
+            mask = self._wk_mask(n_fft, k_dim, obs_per_day, *params['freq_range'],
+                                 *params['wnum_range'], *params['equiv_depth'], wave_name)
+        freq_index, wave_index = np.nonzero(mask)
+        with self._stage('compact', fft_data, wave=wave_name):
+            # 频率、波数两组高级索引被批处理轴隔开，结果形状为 (coef, 批处理维...)
+            coef = np.moveaxis(fft_data[freq_index, ..., wave_index], 0, -1)
+        del fft_data
+
+        others = [d for d in ds.dims if d not in ('time', 'lon')]
+        dims = (*others, 'coef')
+        coords = {k: v for k, v in ds.coords.items()}
+        coords['freq_index'] = ('coef', freq_index.astype(np.int32))
+        coords['wave_index'] = ('coef', wave_index.astype(np.int32))
+        units = ds.attrs.get('units', 'unknown')
+        return xr.Dataset(
+            {
+                'coef_real': (dims, coef.real, {'long_name': f'{wave_name.title()} Spectral Coefficients (real)'}),
+                'coef_imag': (dims, coef.imag, {'long_name': f'{wave_name.title()} Spectral Coefficients (imag)'}),
+            },
+            coords=coords,
+            attrs={
+                'long_name': f'{wave_name.title()} Wave Component',
+                'units': units,
+                'wavenumber': params['wnum_range'],
+                'period': params['freq_range'],
+                'depth': params['equiv_depth'],
+                'waveName': wave_name,
+                'obs_per_day': obs_per_day,
+                'n_harm': n_harm,
+                'n_fft': n_fft,
+                'k_dim': k_dim,
+                'dim_order': ','.join(ds.dims),
+            }
+        )
+
+    @staticmethod
+    def _coord_positions(coord: xr.DataArray, selection) -> np.ndarray:
+        """按坐标标签（标量、列表或 slice）选择时返回对应的整数位置，None 表示全部"""
+        n = coord.size
+        if selection is None:
+            return np.arange(n)
+        positions = xr.DataArray(np.arange(n), coords={coord.name: coord.values}, dims=coord.name)
+        return np.atleast_1d(positions.sel({coord.name: selection}).values)
+
+    @staticmethod
+    def _band_inverse(spec: np.ndarray,
+                      rows: np.ndarray,
+                      t_idx: np.ndarray,
+                      n_fft: int,
+                      method: str = 'auto',
+                      workers: Optional[int] = None) -> np.ndarray:
+        """
+        只在 t_idx 指定的时次上计算时间方向的逆 rFFT：x(t) = Σ_j w_j Re(Y_j e^{2πijt/n}) / n，
+        求和只涉及保留的频率行 rows（0频和Nyquist权重为1，其余为2）。
+
+        参数：
+            spec: (len(rows), ...) 的复数频谱，首轴与 rows 对应（经度方向已逆变换）
+            rows: 升序的 rfft 频率行号
+            t_idx: 需要的时次（整数位置）
+            n_fft: 正变换时的时间轴FFT长度
+            method: 'direct' 按保留的频率行直接做矩阵乘法，代价约 len(t_idx) * len(rows)；
+                    'czt' 对连续时间窗用 chirp-z 变换只计算窗内各点，
+                    代价约 (带宽 + 窗长) * log(带宽 + 窗长)，与记录长度无关；
+                    'fft' 补齐频谱后做完整的逆FFT再取子集；
+                    'auto'（默认）按估计代价选择
+            workers: 逆FFT的线程数
+
+        返回：
+            (len(t_idx), ...) 的实数数组
+        """
+        n_t = len(t_idx)
+        band = int(rows[-1] - rows[0] + 1) if len(rows) else 0
+        contiguous = n_t > 1 and bool(np.all(np.diff(t_idx) == 1))
+        if method == 'auto':
+            cost = {'direct': n_t * len(rows), 'fft': 4 * n_fft * np.log2(max(n_fft, 2))}
+            if contiguous:
+                cost['czt'] = 12 * (band + n_t) * np.log2(band + n_t)
+            method = min(cost, key=cost.get)
+        elif method == 'czt' and not contiguous:
+            raise ValueError("'czt' 只适用于连续的时间窗")
+        elif method not in ('direct', 'czt', 'fft'):
+            raise ValueError(f"未知的重建方法: {method}，可选: 'auto', 'direct', 'czt', 'fft'")
+
+        if len(rows) == 0:
+            return np.zeros((n_t,) + spec.shape[1:], dtype=spec.real.dtype)
+
+        edge = (rows == 0) | ((rows == n_fft // 2) & (n_fft % 2 == 0))
+        weights = (np.where(edge, 1, 2) / n_fft).astype(spec.real.dtype)
+        weights = weights.reshape((-1,) + (1,) * (spec.ndim - 1))
+
+        if method == 'direct':
+            kernel = np.exp(2j * np.pi * np.outer(t_idx, rows) / n_fft).astype(spec.dtype)
+            return np.tensordot(kernel, spec * weights, axes=(1, 0)).real
+
+        if method == 'czt':
+            # 带内系数按 j - rows[0] 排成连续序列，先乘以窗口起点的相位，
+            # 再用 chirp-z 变换在 z = e^{-2πiτ/n}（τ = 0..n_t-1）上求和，最后乘回带的中心频率相位
+            t0 = int(t_idx[0])
+            coef = np.zeros((band,) + spec.shape[1:], dtype=spec.dtype)
+            coef[rows - rows[0]] = spec * weights * np.exp(2j * np.pi * (rows - rows[0]) * t0 / n_fft).reshape(weights.shape)
+            # signal.czt 总是以双精度计算，转回频谱的精度，使输出 dtype 与所选方法无关
+            window = signal.czt(coef, m=n_t, w=np.exp(2j * np.pi / n_fft), a=1, axis=0).astype(spec.dtype, copy=False)
+            phase = np.exp(2j * np.pi * rows[0] * (t0 + np.arange(n_t)) / n_fft).astype(spec.dtype)
+            return (window * phase.reshape((-1,) + (1,) * (spec.ndim - 1))).real
+
+        full = np.zeros((n_fft // 2 + 1,) + spec.shape[1:], dtype=spec.dtype)
+        full[rows] = spec
+        return fft.irfft(full, n=n_fft, axis=0, workers=workers)[t_idx]
+
+    def reconstruct_wave_signal(self,
+                                compact: xr.Dataset,
+                                time=None,
+                                lon=None,
+                                time_index: Optional[np.ndarray] = None,
+                                method: str = 'auto',
+                                n_jobs: int = 1) -> xr.DataArray:
+        """
+        由 extract_wave_spectrum 的紧凑频谱重建滤波场，可只重建部分时间和经度。
+
+        只对保留了系数的频率行做经度逆变换，时间方向的逆变换只在所需时次上计算（见 _band_inverse），
+        重建一个短时间窗（如最近90天或单个事件）的代价与窗长而非记录长度成正比。
+        批处理维（如 lat）的子集可先对 compact 用 isel/sel 选出。
+
+        参数：
+            compact: extract_wave_spectrum 的结果（或其 to_netcdf 后读回的数据集）
+            time: 时间坐标的选择（标签、标签列表或 slice），None 表示全部时次
+            lon: 经度坐标的选择，None 表示全部经度
+            time_index: 按整数位置选择时次（如 np.arange(n - 90, n)），给出时忽略 time
+            method: 时间方向的重建方法，'auto'（默认）、'direct'、'czt' 或 'fft'，见 _band_inverse
+            n_jobs: scipy.fft 的线程数，-1 表示使用所有可用核心（默认单线程）
+
+        返回：
+            重建的滤波场，xr.DataArray类型，维度顺序与原输入一致
+        """
+        n_fft = int(compact.attrs['n_fft'])
+        k_dim = int(compact.attrs['k_dim'])
+        lon_dim = compact.sizes['lon']
+        workers = self._resolve_workers(n_jobs)
+        if time_index is not None:
+            t_idx = np.arange(compact.sizes['time'])[np.atleast_1d(time_index)]
+        else:
+            t_idx = self._coord_positions(compact['time'], time)
+        l_idx = self._coord_positions(compact['lon'], lon)
+
+        others = [d for d in compact.coef_real.dims if d != 'coef']
+        coef_real = compact.coef_real.transpose(*others, 'coef').values
+        coef = coef_real + 1j * compact.coef_imag.transpose(*others, 'coef').values.astype(coef_real.dtype)
+        rows, row_of = np.unique(compact.freq_index.values, return_inverse=True)
+
+        with self._stage('reconstruct', coef):
+            # 保留的频率行上的稠密频谱 (行, 批处理维..., 波数)，经度逆变换后取经度子集
+            spec = np.zeros((len(rows),) + coef.shape[:-1] + (k_dim,), dtype=coef.dtype)
+            spec[row_of, ..., compact.wave_index.values] = np.moveaxis(coef, -1, 0)
+            spec = fft.ifft(spec, n=lon_dim, axis=-1, workers=workers, overwrite_x=True)[..., l_idx]
+            out = self._band_inverse(spec, rows, t_idx, n_fft, method=method, workers=workers)
+
+        coords = {k: v for k, v in compact.coords.items()
+                  if 'coef' not in v.dims and not set(v.dims) & {'time', 'lon'}}
+        coords['time'] = compact['time'].isel(time=t_idx)
+        coords['lon'] = compact['lon'].isel(lon=l_idx)
+        attrs = {k: compact.attrs[k] for k in ('long_name', 'units', 'wavenumber', 'period', 'depth', 'waveName')}
+        dim_order = compact.attrs['dim_order'].split(',')
+        return xr.DataArray(out, coords=coords, dims=('time', *others, 'lon'), attrs=attrs).transpose(*dim_order)
+
+    def iter_wave_signal_chunks(self,
+                                ds: xr.DataArray,
+                                waves: Union[str, List[str]] = 'kelvin',
+                                lat_chunk: int = 8,
+                                obs_per_day: int = 1,
+                                n_harm: int = 3,
+                                dtype: Union[str, np.dtype] = 'float64',
+                                fast_len: bool = False):
+        """
+        按纬度分块流式滤波：每次只读入一个纬度块，完成年循环去除和滤波后产出结果。
+
+        各纬度的年循环和滤波互不相关，分块结果与整体计算完全一致；
+        若 ds 由 xr.open_dataset / xr.open_zarr 惰性打开，峰值内存只取决于单个纬度块。
+
+        参数：
+            ds: 输入数据，xr.DataArray类型，维度应包含('time', 'lat', 'lon')，可另有其他批处理维
+            waves: 波动类型名称或名称列表
+            lat_chunk: 每块包含的纬度数
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 计算精度，'float64'（默认）或 'float32'
+            fast_len: 是否将时间轴补零到快速FFT长度
+
+        返回：
+            生成器，依次产出 (纬度切片, xr.Dataset)，Dataset 中每种波动为一个变量
+        """
+        if isinstance(waves, str):
+            waves = [waves]
+        n_lat = ds.sizes['lat']
+
+        for i0 in range(0, n_lat, lat_chunk):
+            lat_slice = slice(i0, min(i0 + lat_chunk, n_lat))
+            block = ds.isel(lat=lat_slice).load()
+            yield lat_slice, self.extract_wave_signals(block, waves=waves, obs_per_day=obs_per_day,
+                                                       n_harm=n_harm, dtype=dtype, fast_len=fast_len)
+            del block
+
+    def extract_wave_signal_chunked(self,
+                                    ds: Union[xr.DataArray, str],
+                                    store: str,
+                                    waves: Union[str, List[str]] = 'kelvin',
+                                    var: Optional[str] = None,
+                                    lat_chunk: int = 8,
+                                    obs_per_day: int = 1,
+                                    n_harm: int = 3,
+                                    dtype: Union[str, np.dtype] = 'float64',
+                                    fast_len: bool = False) -> str:
+        """
+        超内存数据的分块滤波：逐纬度块读取、滤波并直接追加写入 Zarr 存储。
+
+        参数：
+            ds: 输入数据（惰性打开的 xr.DataArray），或 NetCDF/Zarr 文件路径
+            store: 输出 Zarr 存储路径（已存在时会被覆盖）
+            waves: 波动类型名称或名称列表，每种波动写为一个变量
+            var: ds 为文件路径时要读取的变量名
+            lat_chunk: 每块包含的纬度数，决定峰值内存
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 计算精度，'float64'（默认）或 'float32'，float32 时输出也以单精度存储
+            fast_len: 是否将时间轴补零到快速FFT长度
+
+        返回：
+            输出存储路径，可用 xr.open_zarr(store) 读取
+        """
+        if isinstance(ds, str):
+            if var is None:
+                raise ValueError("从文件读取时必须指定变量名 var")
+            if ds.rstrip('/').endswith('.zarr'):
+                ds = xr.open_zarr(ds, chunks=None)[var]
+            else:
+                ds = xr.open_dataset(ds)[var]
+
+        for lat_slice, block in self.iter_wave_signal_chunks(ds, waves=waves, lat_chunk=lat_chunk,
+                                                             obs_per_day=obs_per_day, n_harm=n_harm,
+                                                             dtype=dtype, fast_len=fast_len):
+            if lat_slice.start == 0:
+                block.to_zarr(store, mode='w')
+            else:
+                block.to_zarr(store, append_dim='lat')
+
+        return store
+
+    @staticmethod
+    def _dayofyear_index(time: xr.DataArray, leap_day: str = 'keep') -> np.ndarray:
+        """
+        计算每个时次的日序号（1~366）。
+
+        参数：
+            time: 时间坐标
+            leap_day: 闰日处理方式，'keep' 与 time.dayofyear 一致（闰年2月29日为第60天，其后顺延），
+                      'feb28' 将2月29日并入2月28日，闰年3月1日之后的日期与平年对齐（共365天）
+        """
+        doy = time.dt.dayofyear.values.astype(np.intp)
+        if leap_day == 'keep':
+            return doy
+        if leap_day == 'feb28':
+            is_leap = time.dt.is_leap_year.values
+            return np.where(is_leap & (doy >= 60), doy - 1, doy)
+        raise ValueError(f"未知的闰日处理方式: {leap_day}，可选: 'keep', 'feb28'")
+
+    def daily_climatology(self,
+                          ds: xr.DataArray,
+                          n_harm: int = 3,
+                          dim: str = 'time',
+                          leap_day: str = 'keep') -> xr.DataArray:
+        """
+        计算经谐波平滑的逐日气候态。
+
+        以预先计算的整数日序号做分段归约求逐日平均，代替 groupby('time.dayofyear')；
+        缺测值（NaN）不参与平均。
+
+        参数：
+            ds: 输入数据，任意维度排列，需包含时间维 dim
+            n_harm: 保留的谐波数，传给 extract_low_harmonics
+            dim: 时间维名称
+            leap_day: 闰日处理方式，见 _dayofyear_index
+
+        返回：
+            dims=('dayofyear', 其余维度...) 的平滑气候态，只包含数据中出现过的日序号
+        """
+        axis = ds.get_axis_num(dim)
+        others = [d for d in ds.dims if d != dim]
+        values = np.moveaxis(ds.values, axis, 0)
+        n_time = values.shape[0]
+        data2d = values.reshape(n_time, -1)
+
+        doy = self._dayofyear_index(ds[dim], leap_day)
+        valid = ~np.isnan(data2d)
+        has_nan = not valid.all()
+        if has_nan:
+            data2d = np.where(valid, data2d, 0)
+
+        # 同一日的连续时次先归约为一行（逐日数据时即为原数组本身，不复制）
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(doy)) + 1))
+        if len(starts) == n_time:
+            run_sums = data2d
+            run_counts = valid if has_nan else None
+        else:
+            run_sums = np.add.reduceat(data2d, starts, axis=0)
+            run_counts = np.add.reduceat(valid, starts, axis=0) if has_nan else None
+        run_doy = doy[starts]
+
+        # 日序号严格递增的各段（通常为一个自然年）内索引互不重复，可直接用花式索引累加
+        sums = np.zeros((367, data2d.shape[1]))
+        counts = np.zeros((367, data2d.shape[1])) if has_nan else None
+        seg = np.concatenate(([0], np.flatnonzero(np.diff(run_doy) <= 0) + 1, [len(run_doy)]))
+        for s0, s1 in zip(seg[:-1], seg[1:]):
+            sums[run_doy[s0:s1]] += run_sums[s0:s1]
+            if has_nan:
+                counts[run_doy[s0:s1]] += run_counts[s0:s1]
+        if not has_nan:
+            counts = np.bincount(doy, minlength=367)[:, np.newaxis]
+
+        present = np.unique(doy)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            clim = sums[present] / counts[present]
+
+        clim = xr.DataArray(
+            clim.reshape((len(present),) + values.shape[1:]),
+            coords={'dayofyear': present, **{k: v for k, v in ds.coords.items() if dim not in v.dims}},
+            dims=('dayofyear', *others),
+            attrs=dict(ds.attrs),
+        )
+        return self.extract_low_harmonics(clim, n_harm=n_harm)
+
+    def remove_annual_cycle(self,
+                            ds: xr.DataArray,
+                            n_harm: int = 3,
+                            dim: str = 'time',
+                            leap_day: str = 'keep',
+                            clim: Optional[xr.DataArray] = None,
+                            dtype: Optional[Union[str, np.dtype]] = None,
+                            out: Optional[np.ndarray] = None) -> xr.DataArray:
+        """
+        去除由前 n_harm 阶谐波平滑后的逐日气候态，返回距平。
+
+        距平按年分段相减并直接写入输出数组，不再经过 groupby 广播。
+
+        参数：
+            ds: 输入数据，任意维度排列，需包含时间维 dim
+            n_harm: 保留的谐波数
+            dim: 时间维名称
+            leap_day: 闰日处理方式，见 _dayofyear_index
+            clim: 预先计算的 daily_climatology 结果，给出时直接复用
+            dtype: 距平的数据类型，默认由输入和气候态的类型提升决定（通常为 float64）
+            out: 预先分配的输出数组（如共享内存缓冲区），形状为 (dim, 其余维度按 ds 中的顺序)，
+                 给出时距平直接写入其中，并作为返回结果的底层数据
+
+        返回：
+            与输入维度顺序一致的距平，xr.DataArray类型
+        """
+        if clim is None:
+            with self._stage('climatology', ds):
+                clim = self.daily_climatology(ds, n_harm=n_harm, dim=dim, leap_day=leap_day)
+
+        others = [d for d in ds.dims if d != dim]
+        clim_np = clim.transpose('dayofyear', *others).values
+        if dtype is not None:
+            clim_np = clim_np.astype(dtype, copy=False)
+        doy = self._dayofyear_index(ds[dim], leap_day)
+        slot = np.searchsorted(clim.dayofyear.values, doy)
+        if np.any(slot >= len(clim.dayofyear)) or np.any(clim.dayofyear.values[np.minimum(slot, len(clim.dayofyear) - 1)] != doy):
+            raise ValueError("气候态中缺少输入数据对应的日序号")
+
+        # 按年分段相减，直接写入输出缓冲区，不额外复制输入
+        values = np.moveaxis(ds.values, ds.get_axis_num(dim), 0)
+        if out is None:
+            anomaly = np.empty(values.shape, dtype=np.result_type(values.dtype, clim_np.dtype) if dtype is None else dtype)
+        elif out.shape != values.shape:
+            raise ValueError(f"out 的形状 {out.shape} 与距平的形状 {values.shape} 不一致")
+        else:
+            anomaly = out
+        step = 366
+        with self._stage('anomaly', values):
+            for t0 in range(0, anomaly.shape[0], step):
+                np.subtract(values[t0:t0 + step], clim_np[slot[t0:t0 + step]], out=anomaly[t0:t0 + step])
+
+        result = xr.DataArray(anomaly, coords=ds.coords, dims=(dim, *others), attrs=dict(ds.attrs))
+        return result.transpose(*ds.dims)
+
+    @staticmethod
+    def _check_symmetry(symmetry: Optional[str], ds: xr.DataArray) -> None:
+        """检查对称分解方式是否有效，分解时输入须有 'lat' 维"""
+        if symmetry not in (None, 'symmetric', 'antisymmetric'):
+            raise ValueError(f"未知的对称分解方式: {symmetry}，可选: None, 'symmetric', 'antisymmetric'")
+        if symmetry is not None and 'lat' not in ds.dims:
+            raise ValueError("对称/反对称分解需要输入包含 'lat' 维")
+
+    def _wrap_filtered(self, filtered: np.ndarray, ds: xr.DataArray, wave_name: str) -> xr.DataArray:
+        """
+        将 (time, ..., lon) 滤波结果包装为带波动参数属性的 DataArray，
+        中间各维按其在 ds 中的顺序排列，输出保留 ds 的全部坐标并换回 ds 的维度顺序
+        """
+        params = self.wave_params[wave_name]
+        others = [d for d in ds.dims if d not in ('time', 'lon')]
+        return xr.DataArray(
             filtered,
             coords=ds.coords,
-            dims=ds.dims,
+            dims=('time', *others, 'lon'),
             attrs={
                 'long_name': f'{wave_name.title()} Wave Component',
                 'units': ds.attrs.get('units', 'unknown'),
-                'wavenumber': (k_min, k_max),
-                'period': (t_min, t_max),
-                'depth': (h_min, h_max),
+                'wavenumber': params['wnum_range'],
+                'period': params['freq_range'],
+                'depth': params['equiv_depth'],
                 'waveName': wave_name
             }
-        )
-        
-        return da_filtered
+        ).transpose(*ds.dims)
     
     def check_filter_wave(self, 
                          python_result: xr.DataArray, 
@@ -1,5 +1,7 @@
 from .core import *
-from .ma import *
 from .utils import *
-from .functions import *
-from .plot import *
\ No newline at end of file
+from .plot import *
+from .realtime import *
+from .spectrum import *
+from .accessor import *
+from .regression import *
\ No newline at end of file
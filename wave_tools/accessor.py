@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+"""
+import numpy as np
+import xarray as xr
+from typing import Dict, List, Optional, Union
+
+from .core import WaveFilter
+from .spectrum import WKSpectrum
+
+
+def _anomaly_block(block: xr.DataArray, wave_filter: WaveFilter, n_harm: int, dtype: str) -> xr.DataArray:
+    """单个数据块的气候态与距平（各格点的年循环互不相关，可逐块计算）"""
+    return wave_filter.remove_annual_cycle(block, n_harm=n_harm, dtype=dtype)
+
+
+def _filter_block(block: xr.DataArray, wave_filter: WaveFilter, wave_name: str,
+                  obs_per_day: int, fast_len: bool) -> xr.DataArray:
+    """单个距平数据块的WK99滤波（块内 time、lon 完整，其余维度为批处理轴）"""
+    params = wave_filter.wave_params[wave_name]
+    filtered = wave_filter._kf_filter_batch(
+        block.transpose('time', ..., 'lon').values,
+        lon=block.lon.values,
+        obs_per_day=obs_per_day,
+        t_min=params['freq_range'][0], t_max=params['freq_range'][1],
+        k_min=params['wnum_range'][0], k_max=params['wnum_range'][1],
+        h_min=params['equiv_depth'][0], h_max=params['equiv_depth'][1],
+        wave_name=wave_name,
+        fast_len=fast_len
+    )
+    return wave_filter._wrap_filtered(filtered, block, wave_name)
+
+
+@xr.register_dataarray_accessor('wave')
+class WaveAccessor:
+    """
+    DataArray 的 .wave 访问器：惰性（dask）波动滤波与波数-频率谱
+
+    filter 只构建 dask 计算图：输入按 time、lon 合并为单块，其余维度（lat 等）分块，
+    每块依次经过"气候态/距平"和"FFT滤波"两层任务。结果可先切片、求统计量或写文件，
+    compute 时只计算所需区域对应的块，例如::
+
+        kelvin = olr.wave.filter('kelvin')
+        hov = kelvin.sel(lat=slice(-10, 10)).mean('lat').compute()
+
+    import wave_tools 即注册该访问器；需要安装 dask。
+    """
+
+    def __init__(self, da: xr.DataArray):
+        self._obj = da
+
+    def _chunked(self, lat_chunk: int, chunks: Optional[Dict[str, int]]) -> xr.DataArray:
+        """time、lon 合并为单块；lat 在输入未分块时按 lat_chunk 分块，chunks 可覆盖其他批处理维"""
+        da = self._obj
+        spec = {'time': -1, 'lon': -1}
+        if 'lat' in da.dims and da.chunks is None:
+            spec['lat'] = lat_chunk
+        spec.update(chunks or {})
+        if spec['time'] != -1 or spec['lon'] != -1:
+            raise ValueError("time 和 lon 维必须各为单块，FFT 需要完整的时间和经度")
+        return da.chunk(spec)
+
+    def anomaly(self,
+                n_harm: int = 3,
+                dtype: Union[str, np.dtype] = 'float64',
+                lat_chunk: int = 8,
+                chunks: Optional[Dict[str, int]] = None,
+                wave_filter: Optional[WaveFilter] = None) -> xr.DataArray:
+        """
+        惰性去除年循环，返回 dask 距平，参数见 filter。
+        """
+        wave_filter = wave_filter if wave_filter is not None else WaveFilter()
+        da = self._chunked(lat_chunk, chunks)
+        template = da.astype(dtype)
+        return xr.map_blocks(_anomaly_block, da,
+                             kwargs={'wave_filter': wave_filter, 'n_harm': n_harm, 'dtype': np.dtype(dtype).str},
+                             template=template)
+
+    def filter(self,
+               wave_name: str = 'kelvin',
+               obs_per_day: int = 1,
+               n_harm: int = 3,
+               dtype: Union[str, np.dtype] = 'float64',
+               fast_len: bool = False,
+               lat_chunk: int = 8,
+               chunks: Optional[Dict[str, int]] = None,
+               wave_filter: Optional[WaveFilter] = None) -> xr.DataArray:
+        """
+        惰性提取特定波动成分，结果与 WaveFilter.extract_wave_signal 一致，但在 compute 之前不做计算。
+
+        参数：
+            wave_name: 波动类型名称，可选值见 WaveFilter.get_available_waves
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            dtype: 计算精度，'float64'（默认）或 'float32'
+            fast_len: 是否将时间轴补零到快速FFT长度
+            lat_chunk: 输入未分块时每块包含的纬度数
+            chunks: 其余批处理维（level、集合成员等）的分块大小，如 {'level': 1}
+            wave_filter: 使用的 WaveFilter 实例（可含 add_wave_param 添加的波动），默认新建
+
+        返回：
+            dask 支持的 xr.DataArray，维度顺序和坐标与输入一致
+        """
+        wave_filter = wave_filter if wave_filter is not None else WaveFilter()
+        anomaly = self.anomaly(n_harm=n_harm, dtype=dtype, lat_chunk=lat_chunk,
+                               chunks=chunks, wave_filter=wave_filter)
+        return self._filter_anomaly(anomaly, wave_name, wave_filter, obs_per_day, fast_len)
+
+    def filters(self,
+                waves: Optional[List[str]] = None,
+                obs_per_day: int = 1,
+                n_harm: int = 3,
+                dtype: Union[str, np.dtype] = 'float64',
+                fast_len: bool = False,
+                lat_chunk: int = 8,
+                chunks: Optional[Dict[str, int]] = None,
+                wave_filter: Optional[WaveFilter] = None) -> xr.Dataset:
+        """
+        惰性提取多种波动，每种波动为一个变量；各波动共享同一层距平任务，参数见 filter。
+        """
+        wave_filter = wave_filter if wave_filter is not None else WaveFilter()
+        if waves is None:
+            waves = wave_filter.get_available_waves()
+        anomaly = self.anomaly(n_harm=n_harm, dtype=dtype, lat_chunk=lat_chunk,
+                               chunks=chunks, wave_filter=wave_filter)
+        return xr.Dataset({w: self._filter_anomaly(anomaly, w, wave_filter, obs_per_day, fast_len)
+                           for w in waves})
+
+    @staticmethod
+    def _filter_anomaly(anomaly: xr.DataArray, wave_name: str, wave_filter: WaveFilter,
+                        obs_per_day: int, fast_len: bool) -> xr.DataArray:
+        """在 dask 距平上追加逐块滤波任务"""
+        wave_name = wave_name.lower()
+        wave_filter.get_wave_params(wave_name)  # 检查波动类型是否有效
+        template = wave_filter._wrap_filtered(anomaly.transpose('time', ..., 'lon').data, anomaly, wave_name)
+        return xr.map_blocks(_filter_block, anomaly,
+                             kwargs={'wave_filter': wave_filter, 'wave_name': wave_name,
+                                     'obs_per_day': obs_per_day, 'fast_len': fast_len},
+                             template=template)
+
+    def spectrum(self, **kwargs) -> xr.Dataset:
+        """
+        WK99 波数-频率功率谱（立即计算，结果很小），参数传给 WKSpectrum，见 WKSpectrum.compute。
+        """
+        return WKSpectrum(**kwargs).compute(self._obj)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+"""
+import numpy as np
+import xarray as xr
+from typing import Optional, Union
+
+from .core import WaveFilter
+
+
+class RealtimeWaveFilter:
+    """
+    实时（增量）波动滤波器
+
+    参照 Wheeler & Weickmann (2001) 的实时滤波方法：只保留最近 window 天的距平，
+    在序列末端补零或补预报后做WK99滤波。每次追加新观测时只刷新最后 n_refresh 天的输出，
+    更早的输出保持不变。年循环气候态在初始化时计算一次，频谱掩膜因窗口长度固定而始终命中缓存。
+    """
+
+    def __init__(self,
+                 wave_name: str = 'kelvin',
+                 window: int = 730,
+                 pad_days: Optional[int] = None,
+                 n_refresh: Optional[int] = None,
+                 obs_per_day: int = 1,
+                 n_harm: int = 3,
+                 clim: Optional[xr.DataArray] = None,
+                 wave_filter: Optional[WaveFilter] = None,
+                 dtype: Union[str, np.dtype] = 'float64'):
+        """
+        参数：
+            wave_name: 波动类型名称
+            window: 滚动窗口长度（天）
+            pad_days: 末端补零/补预报的长度（天），默认取滤波带的最长周期
+            n_refresh: 每次更新时刷新的输出长度（天），默认等于 pad_days
+            obs_per_day: 每天的观测次数（例如，6小时数据为4）
+            n_harm: 年循环谐波提取时保留的谐波数
+            clim: 预先计算的 WaveFilter.daily_climatology 结果，默认在 initialize 时由历史数据计算
+            wave_filter: 使用的 WaveFilter 实例，默认新建
+            dtype: 计算精度，'float64'（默认）或 'float32'
+        """
+        self.wave_filter = wave_filter if wave_filter is not None else WaveFilter()
+        self.params = self.wave_filter.get_wave_params(wave_name)
+        self.wave_name = wave_name.lower()
+
+        if pad_days is None:
+            pad_days = int(np.ceil(self.params['freq_range'][1]))
+        if n_refresh is None:
+            n_refresh = pad_days
+
+        self.obs_per_day = obs_per_day
+        self.n_window = window * obs_per_day
+        self.n_pad = pad_days * obs_per_day
+        self.n_refresh = n_refresh * obs_per_day
+        self.n_harm = n_harm
+        self.clim = clim
+        self.dtype = dtype
+
+        self.anomaly = None
+        self.output = None
+
+    def initialize(self, history: xr.DataArray) -> xr.DataArray:
+        """
+        用历史数据初始化滚动窗口并完成首次滤波。
+
+        参数：
+            history: 历史数据，维度应包含 'time' 和 'lon'，其余维度（lat、level 等）作为批处理轴
+
+        返回：
+            窗口内的滤波结果
+        """
+        if self.clim is None:
+            self.clim = self.wave_filter.daily_climatology(history, n_harm=self.n_harm)
+
+        anomaly = self.wave_filter.remove_annual_cycle(history, clim=self.clim, dtype=self.dtype)
+        self.anomaly = anomaly.transpose('time', ..., 'lon').isel(time=slice(-self.n_window, None))
+        self.output = self._filter()
+        return self.output
+
+    def update(self,
+               new_data: xr.DataArray,
+               forecast: Optional[xr.DataArray] = None) -> xr.DataArray:
+        """
+        追加新观测（一天或多天），刷新最后 n_refresh 天的滤波输出。
+
+        参数：
+            new_data: 新观测，维度与历史数据一致，时间须晚于窗口内最后一个时次
+            forecast: 可选的预报场，用于替代末端补零（不足 pad_days 的部分仍补零）
+
+        返回：
+            刷新后的最后 n_refresh 天滤波结果
+        """
+        if self.anomaly is None:
+            raise RuntimeError("请先调用 initialize 初始化滚动窗口")
+        if new_data.time.values[0] <= self.anomaly.time.values[-1]:
+            raise ValueError("新观测的时间必须晚于窗口内最后一个时次")
+
+        new_anomaly = self.wave_filter.remove_annual_cycle(new_data, clim=self.clim, dtype=self.dtype)
+        self.anomaly = xr.concat(
+            [self.anomaly, new_anomaly.transpose('time', ..., 'lon')], dim='time'
+        ).isel(time=slice(-self.n_window, None))
+
+        fresh = self._filter(forecast)
+
+        # 更早的时次保持已发布的实时结果，只替换最后 n_refresh 个时次
+        n_time = fresh.sizes['time']
+        frozen = self.output.time.isin(fresh.time.values[:max(n_time - self.n_refresh, 0)]).values
+        n_frozen = int(frozen.sum())
+        self.output = xr.concat([self.output.isel(time=frozen), fresh.isel(time=slice(n_frozen, None))],
+                                dim='time')
+
+        return self.output.isel(time=slice(max(n_time - self.n_refresh, 0), None))
+
+    def _filter(self, forecast: Optional[xr.DataArray] = None) -> xr.DataArray:
+        """
+        对窗口内距平末端补零（或补预报）后滤波，返回窗口长度的结果。
+
+        线性趋势只由观测窗口拟合，在补零之前去除（预报段减去外推到预报时次的同一趋势），
+        滤波时不再对补零后的序列去趋势，否则补零段会被拟合成非零的斜坡。
+        """
+        data = self.anomaly.values
+        n_time = data.shape[0]
+        # 中心化时间轴上的最小二乘趋势（与 _kf_filter_batch 内部的去趋势相同），延伸到补零段
+        t = np.arange(n_time + self.n_pad, dtype=data.dtype) - data.dtype.type((n_time - 1) / 2)
+        t = t.reshape((-1,) + (1,) * (data.ndim - 1))
+        mean = data.mean(axis=0)
+        slope = np.tensordot(t[:n_time, ...].ravel(), data, axes=(0, 0)) / (np.sum(t[:n_time] ** 2) or 1)
+
+        padded = np.zeros((n_time + self.n_pad,) + data.shape[1:], dtype=data.dtype)
+        padded[:n_time] = data - mean - t[:n_time] * slope
+
+        if forecast is not None:
+            fc = self.wave_filter.remove_annual_cycle(forecast, clim=self.clim, dtype=self.dtype)
+            fc = fc.transpose('time', ..., 'lon').values[:self.n_pad]
+            n_fc = fc.shape[0]
+            padded[n_time:n_time + n_fc] = fc - mean - t[n_time:n_time + n_fc] * slope
+
+        t_min, t_max = self.params['freq_range']
+        k_min, k_max = self.params['wnum_range']
+        h_min, h_max = self.params['equiv_depth']
+        filtered = self.wave_filter._kf_filter_batch(
+            padded,
+            lon=self.anomaly.lon.values,
+            obs_per_day=self.obs_per_day,
+            t_min=t_min, t_max=t_max,
+            k_min=k_min, k_max=k_max,
+            h_min=h_min, h_max=h_max,
+            wave_name=self.wave_name,
+            detrend=False
+        )[:n_time]
+
+        out = self.anomaly.copy(data=filtered)
+        out.attrs.update({
+            'long_name': f'Real-time {self.wave_name.title()} Wave Component',
+            'wavenumber': (k_min, k_max),
+            'period': (t_min, t_max),
+            'depth': (h_min, h_max),
+            'waveName': self.wave_name,
+            'pad_days': self.n_pad // self.obs_per_day,
+        })
+        return out
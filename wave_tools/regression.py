@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+"""
+import numpy as np
+import xarray as xr
+from scipy import signal, fft
+from typing import Iterator, Tuple
+
+from .core import WaveFilter
+
+
+class LagRegression:
+    """
+    基于滤波指数的超前-滞后回归与位相合成
+
+    回归对所有滞后和所有格点一次完成：指数与场沿时间补零后做 rFFT，互相关为 conj(I)·F 的逆变换，
+    取 [-max_lag, max_lag] 内的滞后；位相合成用指数的解析信号给出位相和振幅，按位相分箱后
+    以一次矩阵乘法求各箱平均。两者均按纬度块流式读取场，峰值内存只取决于 lat_chunk。
+    """
+
+    def __init__(self,
+                 max_lag: int = 20,
+                 lat_chunk: int = 8,
+                 standardize: bool = True,
+                 n_jobs: int = 1):
+        """
+        参数：
+            max_lag: 最大滞后（时次数），正滞后表示场落后于指数
+            lat_chunk: 每次读入的纬度数，决定峰值内存（无 'lat' 维时整体计算）
+            standardize: 为 True 时回归系数为指数每变化一个标准差对应的场的变化，否则为每单位指数
+            n_jobs: scipy.fft 的线程数，-1 表示使用所有可用核心（默认单线程）
+        """
+        self.max_lag = max_lag
+        self.lat_chunk = lat_chunk
+        self.standardize = standardize
+        self.workers = WaveFilter._resolve_workers(n_jobs)
+
+    @staticmethod
+    def _align(index: xr.DataArray, field: xr.DataArray) -> Tuple[xr.DataArray, xr.DataArray]:
+        """按时间对齐指数与场（取交集），指数须为只含 'time' 维的一维序列"""
+        if index.dims != ('time',):
+            raise ValueError(f"指数须为只含 'time' 维的一维序列，实际维度为 {index.dims}")
+        index, field = xr.align(index, field, join='inner', exclude=[d for d in field.dims if d != 'time'])
+        if index.sizes['time'] <= 1:
+            raise ValueError("指数与场在时间上没有足够的重叠")
+        return index, field
+
+    def _chunks(self, field: xr.DataArray) -> Iterator[Tuple[dict, np.ndarray]]:
+        """按纬度块产出 ({'lat': 切片}, (time, ...) 数组的副本)，维度顺序为 time 在前、其余保持原顺序"""
+        field = field.transpose('time', ...)
+        if 'lat' not in field.dims:
+            yield {}, np.array(field.values, dtype=float)
+            return
+        n_lat = field.sizes['lat']
+        for i0 in range(0, n_lat, self.lat_chunk):
+            sel = {'lat': slice(i0, min(i0 + self.lat_chunk, n_lat))}
+            yield sel, np.array(field.isel(sel).values, dtype=float)
+
+    def regress(self, index: xr.DataArray, field: xr.DataArray) -> xr.Dataset:
+        """
+        场对指数的超前-滞后回归与相关。
+
+        参数：
+            index: 一维指数（如某基点的滤波 OLR），维度为 'time'
+            field: 待回归的场（原始或滤波场），需包含 'time' 维，其余维度任意；缺测值须事先处理
+
+        返回：
+            xr.Dataset，dims=('lag', 场的其余维度...)：
+                regression: 回归系数 cov(index(t), field(t + lag)) / var(index)（standardize 时除以标准差）
+                correlation: 相关系数
+            协方差按各滞后的重叠样本数 (n - |lag|) 归一化
+        """
+        index, field = self._align(index, field)
+        n_time = index.sizes['time']
+        max_lag = min(self.max_lag, n_time - 1)
+        lags = np.arange(-max_lag, max_lag + 1)
+        n_fft = fft.next_fast_len(n_time + max_lag, real=True)
+
+        idx = index.values.astype(float)
+        idx = idx - idx.mean()
+        idx_std = idx.std()
+        spec_idx = np.conj(fft.rfft(idx, n=n_fft))
+        overlap = (n_time - np.abs(lags)).astype(float)
+        scale = idx_std if self.standardize else idx_std ** 2
+
+        field = field.transpose('time', ...)
+        others = list(field.dims[1:])
+        shape = (len(lags),) + field.shape[1:]
+        regression = np.empty(shape)
+        correlation = np.empty(shape)
+        for sel, values in self._chunks(field):
+            values -= values.mean(axis=0)
+            spec = fft.rfft(values, n=n_fft, axis=0, workers=self.workers)
+            spec *= spec_idx.reshape((-1,) + (1,) * (spec.ndim - 1))
+            cross = fft.irfft(spec, n=n_fft, axis=0, workers=self.workers, overwrite_x=True)
+            # 负滞后位于循环互相关的末端
+            cov = cross[lags % n_fft] / overlap.reshape((-1,) + (1,) * (cross.ndim - 1))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov / (idx_std * values.std(axis=0))
+            block = (slice(None),) + tuple(sel.get(d, slice(None)) for d in others)
+            regression[block] = cov / scale
+            correlation[block] = corr
+
+        coords = {k: v for k, v in field.coords.items() if 'time' not in v.dims}
+        coords['lag'] = lags
+        dims = ('lag', *others)
+        units = field.attrs.get('units', 'unknown')
+        return xr.Dataset(
+            {
+                'regression': (dims, regression, {
+                    'long_name': 'Lagged Regression Coefficient',
+                    'units': units if self.standardize else f"{units} per {index.attrs.get('units', 'unit')}",
+                }),
+                'correlation': (dims, correlation, {'long_name': 'Lagged Correlation'}),
+            },
+            coords=coords,
+            attrs={'max_lag': max_lag, 'standardize': int(self.standardize), 'n_time': n_time},
+        )
+
+    @staticmethod
+    def index_phase(index: xr.DataArray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        指数的位相（弧度，-π~π）和标准化振幅。
+
+        复数指数（WaveFilter.extract_wave_signal(..., analytic=True) 的结果）直接使用，
+        实数指数先去均值后用 scipy.signal.hilbert 求解析信号；振幅除以指数实部的标准差。
+        """
+        values = index.values
+        if not np.iscomplexobj(values):
+            values = signal.hilbert(values - values.mean())
+        std = values.real.std()
+        return np.angle(values), np.abs(values) / (std if std > 0 else 1)
+
+    def composite(self,
+                  index: xr.DataArray,
+                  field: xr.DataArray,
+                  n_bins: int = 8,
+                  amplitude_threshold: float = 1.0) -> xr.Dataset:
+        """
+        按滤波指数的位相分箱合成场。
+
+        参数：
+            index: 一维滤波指数（实数或复数解析信号），维度为 'time'
+            field: 待合成的场，需包含 'time' 维，其余维度任意
+            n_bins: 位相箱数，箱 1 从 -π 开始，位相按逆时针增加
+            amplitude_threshold: 只使用标准化振幅不小于该值的时次
+
+        返回：
+            xr.Dataset，dims=('phase', 场的其余维度...)：
+                composite: 各位相箱内场的平均（无样本的箱为 NaN）
+                n_samples: 各位相箱的样本数（dims=('phase',)）
+            坐标 phase 为箱序号 1..n_bins，phase_center 为箱中心位相（弧度）
+        """
+        index, field = self._align(index, field)
+        phase, amplitude = self.index_phase(index)
+        edges = np.linspace(-np.pi, np.pi, n_bins + 1)
+        bins = np.clip(np.digitize(phase, edges) - 1, 0, n_bins - 1)
+        active = amplitude >= amplitude_threshold
+
+        # (箱, time) 的平均权重矩阵：一次矩阵乘法得到所有箱的合成
+        weights = np.zeros((n_bins, len(phase)))
+        weights[bins[active], np.flatnonzero(active)] = 1
+        count = weights.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights /= count[:, np.newaxis]
+
+        field = field.transpose('time', ...)
+        others = list(field.dims[1:])
+        comp = np.empty((n_bins,) + field.shape[1:])
+        for sel, values in self._chunks(field):
+            block = (slice(None),) + tuple(sel.get(d, slice(None)) for d in others)
+            comp[block] = np.tensordot(weights, values, axes=(1, 0))
+
+        coords = {k: v for k, v in field.coords.items() if 'time' not in v.dims}
+        coords['phase'] = np.arange(1, n_bins + 1)
+        coords['phase_center'] = ('phase', 0.5 * (edges[:-1] + edges[1:]))
+        return xr.Dataset(
+            {
+                'composite': (('phase', *others), comp, {
+                    'long_name': 'Phase Composite',
+                    'units': field.attrs.get('units', 'unknown'),
+                }),
+                'n_samples': (('phase',), count.astype(int), {'long_name': 'Number of Samples'}),
+            },
+            coords=coords,
+            attrs={'n_bins': n_bins, 'amplitude_threshold': amplitude_threshold},
+        )
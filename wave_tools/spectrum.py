@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Created on %(date)s
+
+@author: %(username)s
+
+@email : xianpuji@hhu.edu.cn
+"""
+import numpy as np
+import xarray as xr
+from scipy import signal, fft
+from typing import Optional, Sequence, Tuple, Union
+
+from .core import WaveFilter, _detrend_taper_inplace
+
+
+def smooth_121(data: np.ndarray, axis: int = -1, passes: Union[int, np.ndarray] = 1) -> np.ndarray:
+    """
+    沿 axis 做多次 1-2-1 滑动平滑，端点保持不变。
+
+    参数：
+        data: 输入数组（不被修改）
+        axis: 平滑所沿的轴
+        passes: 平滑次数；也可为与 data 维数相同、沿 axis 长度为1的整数数组，
+                按位置指定不同的次数（如 WK99 背景谱中随频率增加的波数平滑次数）
+
+    返回：
+        平滑后的数组
+    """
+    out = np.moveaxis(np.array(data, dtype=float), axis, -1)
+    passes = np.asarray(passes)
+    if passes.ndim:
+        passes = np.moveaxis(passes, axis, -1)
+    for i in range(int(passes.max(initial=0))):
+        smoothed = 0.25 * out[..., :-2] + 0.5 * out[..., 1:-1] + 0.25 * out[..., 2:]
+        if passes.ndim:
+            out[..., 1:-1] = np.where(passes > i, smoothed, out[..., 1:-1])
+        else:
+            out[..., 1:-1] = smoothed
+    return np.moveaxis(out, -1, axis)
+
+
+class WKSpectrum:
+    """
+    Wheeler–Kiladis (1999) 波数-频率功率谱
+
+    对赤道带资料做关于赤道的对称/反对称分解，切成相互重叠的分段（默认96天、重叠65天），
+    各段去线性趋势并加窗后批量做 (时间, 经度) FFT，功率按分段平均、按纬度求和；
+    背景谱为对称与反对称谱的平均经多次 1-2-1 平滑所得。
+    FFT约定与 WaveFilter._kf_filter 一致：时间轴 rfft，正波数为东传，经度首尾重复点被丢弃。
+    """
+
+    # WK99 背景谱沿波数的平滑次数随频率增加：(频率上限 cpd, 次数)
+    WAVE_PASSES = ((0.1, 5), (0.2, 10), (0.3, 20), (np.inf, 40))
+
+    def __init__(self,
+                 segment_days: int = 96,
+                 overlap_days: int = 65,
+                 obs_per_day: int = 1,
+                 lat_range: Tuple[float, float] = (-15, 15),
+                 n_harm: Optional[int] = 3,
+                 taper_alpha: float = 0.1,
+                 wave_passes: Sequence[Tuple[float, int]] = WAVE_PASSES,
+                 freq_passes: int = 10,
+                 n_jobs: int = -1,
+                 segment_batch: int = 64,
+                 wave_filter: Optional[WaveFilter] = None):
+        """
+        参数：
+            segment_days: 分段长度（天）
+            overlap_days: 相邻分段的重叠长度（天）
+            obs_per_day: 每天的观测次数
+            lat_range: 参与计算的纬度范围，须关于赤道对称
+            n_harm: 先去除由前 n_harm 阶谐波构成的年循环，None 表示不去除
+            taper_alpha: 各段 Tukey 窗的 alpha（0.1 即两端各 5% 的余弦过渡）
+            wave_passes: 背景谱沿波数的 1-2-1 平滑次数，按频率分段给出
+            freq_passes: 背景谱沿频率的 1-2-1 平滑次数
+            n_jobs: 分段FFT的线程数（scipy.fft workers），-1 表示使用所有可用核心
+            segment_batch: 每批同时做FFT的分段数，决定峰值内存
+            wave_filter: 用于年循环去除的 WaveFilter 实例，默认新建
+        """
+        if overlap_days >= segment_days:
+            raise ValueError("overlap_days 必须小于 segment_days")
+        self.wave_filter = wave_filter if wave_filter is not None else WaveFilter()
+        self.segment_days = segment_days
+        self.overlap_days = overlap_days
+        self.obs_per_day = obs_per_day
+        self.lat_range = lat_range
+        self.n_harm = n_harm
+        self.taper_alpha = taper_alpha
+        self.wave_passes = tuple(wave_passes)
+        self.freq_passes = freq_passes
+        self.workers = WaveFilter._resolve_workers(n_jobs)
+        self.segment_batch = segment_batch
+
+    @property
+    def segment_length(self) -> int:
+        """每段的时次数"""
+        return self.segment_days * self.obs_per_day
+
+    def segment_starts(self, n_time: int) -> np.ndarray:
+        """各分段的起始时次（末尾不足一段的部分舍去）"""
+        step = (self.segment_days - self.overlap_days) * self.obs_per_day
+        return np.arange(0, n_time - self.segment_length + 1, step)
+
+    def _equatorial_band(self, ds: xr.DataArray) -> xr.DataArray:
+        """截取 lat_range 内的资料，纬度升序排列，并检查关于赤道对称"""
+        lat = ds.lat.values
+        band = ds.isel(lat=np.flatnonzero((lat >= self.lat_range[0]) & (lat <= self.lat_range[1])))
+        band = band.sortby('lat')
+        if not np.allclose(band.lat.values, -band.lat.values[::-1]):
+            raise ValueError("纬度网格须关于赤道对称才能做对称/反对称分解")
+        return band
+
+    @staticmethod
+    def split_symmetric(values: np.ndarray, lat_axis: int = 1) -> np.ndarray:
+        """
+        关于赤道的对称/反对称分解（纬度升序且对称），只保留赤道及以北的一半。
+
+        返回：
+            在 lat_axis 前插入长度为2的分量轴（0: 对称, 1: 反对称）的数组
+        """
+        values = np.moveaxis(values, lat_axis, 0)
+        n_lat = values.shape[0]
+        north = values[n_lat // 2:]
+        south = values[(n_lat - 1) // 2::-1]
+        out = np.stack([0.5 * (north + south), 0.5 * (north - south)])
+        return np.moveaxis(out, (0, 1), (lat_axis, lat_axis + 1))
+
+    def _segment_spectra(self, *fields: np.ndarray):
+        """
+        分段谱生成器：各场形状相同，为 (time, ..., lon)（经度已去掉重复点），
+        每次产出一批分段的谱，形状为 (频率, 分段, ..., 波数)，波数为 rfft 原始顺序；
+        多个场时在分段轴之后插入场轴，各场的分段在同一次FFT中计算。
+
+        各批分段依次去趋势、加窗并一次FFT，峰值内存只取决于 segment_batch。
+        FFT 按 norm='forward' 归一化。
+        """
+        length = self.segment_length
+        n_time = fields[0].shape[0]
+        starts = self.segment_starts(n_time)
+        if len(starts) == 0:
+            raise ValueError(f"时间长度 {n_time} 不足一个分段（{length} 个时次）")
+
+        taper = signal.windows.tukey(length, alpha=self.taper_alpha).astype(np.result_type(*fields))
+        offsets = np.arange(length)[:, np.newaxis]
+        for b0 in range(0, len(starts), self.segment_batch):
+            # (length, n_batch, ..., lon)：分段轴作为批处理轴，一次FFT
+            index = offsets + starts[np.newaxis, b0:b0 + self.segment_batch]
+            if len(fields) == 1:
+                segments = fields[0][index]
+            else:
+                segments = np.stack([f[index] for f in fields], axis=2)
+            _detrend_taper_inplace(segments, taper)
+            yield fft.rfftn(segments, axes=(-1, 0), norm='forward', workers=self.workers)
+
+    def _one_sided(self, spec: np.ndarray, n_segments: int) -> np.ndarray:
+        """分段平均，并将正频率（除0和Nyquist外）的谱加倍为单边谱"""
+        spec /= n_segments
+        n_freq = spec.shape[0]
+        spec[1:n_freq - 1 if self.segment_length % 2 == 0 else n_freq] *= 2
+        return spec
+
+    def _segment_power(self, data: np.ndarray) -> np.ndarray:
+        """
+        分段功率谱：返回 (频率, ..., 波数) 的分段平均功率，波数为 rfft 原始顺序。
+
+        正频率功率加倍，使功率在整个 (频率, 波数) 网格上的和等于加窗后分段的均方值。
+        """
+        power = 0.0
+        for spec in self._segment_spectra(data):
+            power = power + (spec.real ** 2 + spec.imag ** 2).sum(axis=1)
+        return self._one_sided(power, len(self.segment_starts(data.shape[0])))
+
+    def _segment_cross(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        分段交叉谱：x、y 形状相同，均为 (time, ..., lon)。
+        两个场在同一批分段中一起做FFT，返回分段平均的 (Pxx, Pyy, Pxy)，Pxy = X·conj(Y)。
+        """
+        pxx = pyy = pxy = 0.0
+        for spec in self._segment_spectra(x, y):
+            sx, sy = spec[:, :, 0], spec[:, :, 1]
+            pxx = pxx + (sx.real ** 2 + sx.imag ** 2).sum(axis=1)
+            pyy = pyy + (sy.real ** 2 + sy.imag ** 2).sum(axis=1)
+            pxy = pxy + (sx * sy.conj()).sum(axis=1)
+        n_segments = len(self.segment_starts(x.shape[0]))
+        return tuple(self._one_sided(p, n_segments) for p in (pxx, pyy, pxy))
+
+    @staticmethod
+    def _wk_order(power: np.ndarray, k_dim: int) -> Tuple[np.ndarray, np.ndarray]:
+        """rfft 原始波数顺序换为东传为正的升序波数（与 get_transfer_function 相同）"""
+        wavenumber = np.fft.fftshift(np.fft.fftfreq(k_dim, 1 / k_dim)).astype(int)
+        return power[..., (-wavenumber) % k_dim], wavenumber
+
+    def background(self, power: np.ndarray, frequency: np.ndarray) -> np.ndarray:
+        """
+        背景谱：对称与反对称谱的平均，沿波数按频率分段平滑后再沿频率平滑（均为 1-2-1）。
+
+        参数：
+            power: (频率, 分量, 波数) 的原始功率谱
+            frequency: 频率坐标（cpd）
+        """
+        back = power.mean(axis=1)
+        passes = np.zeros(frequency.shape, dtype=int)
+        for f_max, n in reversed(self.wave_passes):
+            passes[frequency < f_max] = n
+        back = smooth_121(back, axis=1, passes=passes[:, np.newaxis])
+        return smooth_121(back, axis=0, passes=self.freq_passes)
+
+    def _components(self, ds: xr.DataArray) -> np.ndarray:
+        """
+        预处理：截取赤道带、去除年循环、丢掉重复经度点并做对称/反对称分解。
+
+        返回：
+            (time, 分量, 纬度, lon) 的数组，分量与纬度在分段FFT中一起作为批处理轴
+        """
+        band = self._equatorial_band(ds)
+        if self.n_harm is not None:
+            band = self.wave_filter.remove_annual_cycle(band, n_harm=self.n_harm)
+        band = band.transpose('time', 'lat', 'lon')
+
+        values = band.values
+        if WaveFilter._lon_wraps(band.lon.values):
+            values = values[..., 1:]  # 丢掉第一个点
+        return self.split_symmetric(values, lat_axis=1)
+
+    def _frequency(self) -> np.ndarray:
+        """分段谱的频率坐标（cpd，不含0频）"""
+        return np.fft.rfftfreq(self.segment_length, 1 / self.obs_per_day)[1:]
+
+    @staticmethod
+    def _label_grid(out: xr.Dataset) -> xr.Dataset:
+        """为 (frequency, wavenumber) 坐标添加属性"""
+        out.frequency.attrs['units'] = 'cycles/day'
+        out.wavenumber.attrs['long_name'] = 'zonal wavenumber (positive eastward)'
+        return out
+
+    def compute(self, ds: xr.DataArray) -> xr.Dataset:
+        """
+        计算WK99波数-频率功率谱。
+
+        参数：
+            ds: 输入数据，xr.DataArray类型，维度应包含('time', 'lat', 'lon')，纬度网格关于赤道对称
+
+        返回：
+            xr.Dataset，dims=("frequency", "wavenumber")，frequency 单位为 cycles/day（不含0频），
+            wavenumber 正值为东传。变量：
+                power_sym / power_asym: 对称/反对称分量的原始功率（分段平均、纬度求和）
+                background: 平滑背景谱
+                ratio_sym / ratio_asym: 原始功率与背景谱之比
+        """
+        components = self._components(ds)
+        k_dim = components.shape[-1]
+
+        power = self._segment_power(components).sum(axis=2)
+        power, wavenumber = self._wk_order(power, k_dim)
+
+        frequency = self._frequency()
+        power = power[1:]
+        back = self.background(power, frequency)
+
+        coords = {'frequency': frequency, 'wavenumber': wavenumber}
+        dims = ('frequency', 'wavenumber')
+        units = ds.attrs.get('units', 'unknown')
+        out = xr.Dataset(
+            {
+                'power_sym': (dims, power[:, 0], {'long_name': 'Symmetric Raw Power', 'units': f'({units})^2'}),
+                'power_asym': (dims, power[:, 1], {'long_name': 'Antisymmetric Raw Power', 'units': f'({units})^2'}),
+                'background': (dims, back, {'long_name': 'Smoothed Background Power', 'units': f'({units})^2'}),
+                'ratio_sym': (dims, power[:, 0] / back, {'long_name': 'Symmetric Power / Background'}),
+                'ratio_asym': (dims, power[:, 1] / back, {'long_name': 'Antisymmetric Power / Background'}),
+            },
+            coords=coords,
+            attrs={
+                'segment_days': self.segment_days,
+                'overlap_days': self.overlap_days,
+                'n_segments': len(self.segment_starts(components.shape[0])),
+                'lat_range': self.lat_range,
+                'obs_per_day': self.obs_per_day,
+            }
+        )
+        return self._label_grid(out)
+
+    def cross_spectrum(self, x: xr.DataArray, y: xr.DataArray, freq_passes: int = 1) -> xr.Dataset:
+        """
+        计算两个场在波数-频率空间的交叉谱、凝聚度平方与位相（如 OLR 与 U850）。
+
+        两个场的分段在同一次FFT中计算，按 segment_batch 流式处理；
+        交叉谱按分段平均、按纬度求和，再沿频率做 freq_passes 次 1-2-1 平滑后求凝聚度。
+
+        参数：
+            x, y: 输入数据，xr.DataArray类型，维度应包含('time', 'lat', 'lon')，坐标须完全一致
+            freq_passes: 求凝聚度前沿频率的 1-2-1 平滑次数，0 表示不平滑
+
+        返回：
+            xr.Dataset，dims=("frequency", "wavenumber")，对称(_sym)/反对称(_asym)分量各有变量：
+                power_x / power_y: 两个场的功率谱
+                cospec / quadspec: 同相谱与正交谱，即 X·conj(Y) 的实部与虚部
+                coh2: 凝聚度平方 |Pxy|^2 / (Pxx·Pyy)
+                phase: 位相 arg(X·conj(Y))（弧度），FFT约定同 WaveFilter._kf_filter
+        """
+        try:
+            x, y = xr.align(x, y, join='exact')
+        except ValueError as e:
+            raise ValueError(f"x 与 y 的坐标不一致: {e}") from e
+
+        cx = self._components(x)
+        cy = self._components(y)
+        k_dim = cx.shape[-1]
+
+        ordered = [self._wk_order(p.sum(axis=2), k_dim) for p in self._segment_cross(cx, cy)]
+        spectra = [p[1:] for p, _ in ordered]
+        wavenumber = ordered[0][1]
+        if freq_passes:
+            pxx, pyy = (smooth_121(p, axis=0, passes=freq_passes) for p in spectra[:2])
+            pxy = (smooth_121(spectra[2].real, axis=0, passes=freq_passes)
+                   + 1j * smooth_121(spectra[2].imag, axis=0, passes=freq_passes))
+        else:
+            pxx, pyy, pxy = spectra
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coh2 = (pxy.real ** 2 + pxy.imag ** 2) / (pxx * pyy)
+        phase = np.angle(pxy)
+
+        dims = ('frequency', 'wavenumber')
+        ux = x.attrs.get('units', 'unknown')
+        uy = y.attrs.get('units', 'unknown')
+        data_vars = {}
+        for i, name in enumerate(('sym', 'asym')):
+            label = 'Symmetric' if name == 'sym' else 'Antisymmetric'
+            data_vars.update({
+                f'power_x_{name}': (dims, pxx[:, i], {'long_name': f'{label} Power of x', 'units': f'({ux})^2'}),
+                f'power_y_{name}': (dims, pyy[:, i], {'long_name': f'{label} Power of y', 'units': f'({uy})^2'}),
+                f'cospec_{name}': (dims, pxy[:, i].real, {'long_name': f'{label} Co-spectrum', 'units': f'({ux})({uy})'}),
+                f'quadspec_{name}': (dims, pxy[:, i].imag, {'long_name': f'{label} Quadrature Spectrum', 'units': f'({ux})({uy})'}),
+                f'coh2_{name}': (dims, coh2[:, i], {'long_name': f'{label} Coherence Squared'}),
+                f'phase_{name}': (dims, phase[:, i], {'long_name': f'{label} Phase (x relative to y)', 'units': 'radians'}),
+            })
+
+        out = xr.Dataset(
+            data_vars,
+            coords={'frequency': self._frequency(), 'wavenumber': wavenumber},
+            attrs={
+                'segment_days': self.segment_days,
+                'overlap_days': self.overlap_days,
+                'n_segments': len(self.segment_starts(cx.shape[0])),
+                'lat_range': self.lat_range,
+                'obs_per_day': self.obs_per_day,
+                'freq_passes': freq_passes,
+            }
+        )
+        return self._label_grid(out)
\ No newline at end of file